@@ -8,10 +8,13 @@ y luego conecta a una base de datos MongoDB local para almacenar cada segmento
 como un documento separado en una colección nombrada según el archivo.
 
 Uso:
-    python 1-extraer_texto_a mongodb.py
+    python 1-extraer_texto_a mongodb.py [--verbose]
+
+    --verbose: muestra en consola cada línea insertada
 
 Dependencias:
     - pymongo: Para la conexión y operaciones con MongoDB
+    - db_utils.py: Cliente MongoDB compartido (en este mismo directorio)
     - El archivo de texto especificado debe existir en el mismo directorio
 
 Colección MongoDB:
@@ -20,28 +23,43 @@ Colección MongoDB:
     - Documentos: {"_id": int, "linea": str}
 """
 
-import pymongo
 import os
+import sys
+import itertools
+from db_utils import get_client
+
+# Número de documentos por cada insert_many
+TAMANO_LOTE = 1000
+
+# Mostrar cada línea en consola solo si se pide explícitamente
+VERBOSE = "--verbose" in sys.argv
 
 def segmentar_frases(ruta_archivo: str):
     """
-    Lee un archivo de texto y lo segmenta en líneas por saltos de línea.
+    Lee un archivo de texto y genera sus líneas una a una, sin cargarlo entero en memoria.
     """
+    # El modo texto normaliza los saltos de línea (\r\n y \r pasan a \n)
     with open(ruta_archivo, "r", encoding="utf-8") as f:
-        contenido = f.read()
-
-    frases = contenido.split('\n')
+        termina_en_salto = True
+        for linea in f:
+            termina_en_salto = linea.endswith("\n")
+            yield linea[:-1] if termina_en_salto else linea
 
-    return frases
+    # Igual que split('\n'): un salto final (o un archivo vacío) deja una última línea vacía
+    if termina_en_salto:
+        yield ""
 
 
 # Ejemplo de uso
 if __name__ == "__main__":
     ruta = "el_quijote.txt"
-    resultado = segmentar_frases(ruta)
+    frases = segmentar_frases(ruta)
+
+    # Leer el primer lote antes de tocar la colección (si el archivo no existe, falla aquí)
+    lote = list(itertools.islice(frases, TAMANO_LOTE))
 
     # Conectar a MongoDB
-    client = pymongo.MongoClient()
+    client = get_client()
     db = client.traducciones
     base = os.path.basename(ruta)
     coleccion_nombre = os.path.splitext(base)[0]
@@ -50,6 +68,17 @@ if __name__ == "__main__":
     # Limpiar la colección antes de insertar (opcional, para evitar duplicados)
     coleccion.delete_many({})
 
-    for i, frase in enumerate(resultado, 1):
-        coleccion.insert_one({"_id": i, "linea": frase})
-        print(f"{i}: {frase}")  # Opcional, para ver en consola
+    # Insertar por lotes (en orden ascendente de _id) a medida que se lee el archivo
+    total = 0
+    while lote:
+        documentos = [{"_id": total + i, "linea": frase} for i, frase in enumerate(lote, 1)]
+        coleccion.insert_many(documentos, ordered=True)
+
+        if VERBOSE:
+            # Una sola escritura en consola por lote en lugar de un print por frase
+            sys.stdout.write("".join(f"{doc['_id']}: {doc['linea']}\n" for doc in documentos))
+
+        total += len(lote)
+        lote = list(itertools.islice(frases, TAMANO_LOTE))
+
+    print(f"{total} líneas insertadas en '{coleccion_nombre}'.")
@@ -15,6 +15,7 @@ Dependencias:
     - pymongo: Para la conexión y operaciones con MongoDB
     - PySide6: Para la interfaz gráfica
     - PyPDF2: Para extraer texto de archivos PDF
+    - db_utils.py: Cliente MongoDB compartido (en este mismo directorio)
     - El archivo especificado debe existir
 
 Colección MongoDB:
@@ -25,11 +26,15 @@ Colección MongoDB:
 
 import sys
 import os
+import mmap
 from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QProgressBar, QFileDialog, QMessageBox
 from PySide6.QtGui import QPalette, QColor
 from PySide6.QtCore import QThread, Signal
-import pymongo
 import PyPDF2
+from db_utils import get_client
+
+# Número de documentos por cada insert_many
+TAMANO_LOTE = 1000
 
 
 class WorkerThread(QThread):
@@ -49,7 +54,7 @@ class WorkerThread(QThread):
             resultado = self.segmentar_frases(self.ruta_archivo)
 
             # Conectar a MongoDB
-            client = pymongo.MongoClient()
+            client = get_client()
             db = client.traducciones
             base = os.path.basename(self.ruta_archivo)
             coleccion_nombre = os.path.splitext(base)[0]
@@ -59,13 +64,22 @@ class WorkerThread(QThread):
             coleccion.delete_many({})
 
             total = len(resultado)
-            for i, frase in enumerate(resultado, 1):
+            documentos = [{"_id": i, "linea": frase} for i, frase in enumerate(resultado, 1)]
+            ultimo_porcentaje = -1
+            for inicio in range(0, total, TAMANO_LOTE):
                 if self.is_cancelled:
                     self.finished_signal.emit(False, "Operación cancelada por el usuario.")
                     return
 
-                coleccion.insert_one({"_id": i, "linea": frase})
-                self.progress.emit(int((i / total) * 100))
+                # Lotes en orden ascendente de _id: la colección está vacía y la inserción es secuencial
+                lote = documentos[inicio:inicio + TAMANO_LOTE]
+                coleccion.insert_many(lote, ordered=True)
+
+                # Emitir solo cuando cambia el porcentaje entero
+                porcentaje = ((inicio + len(lote)) * 100) // total
+                if porcentaje != ultimo_porcentaje:
+                    self.progress.emit(porcentaje)
+                    ultimo_porcentaje = porcentaje
 
             self.finished_signal.emit(True, f"Proceso completado. {total} líneas insertadas en '{coleccion_nombre}'.")
         except Exception as e:
@@ -83,13 +97,22 @@ class WorkerThread(QThread):
 
         ext = os.path.splitext(ruta_archivo)[1].lower()
         if ext == ".txt":
-            with open(ruta_archivo, "r", encoding="utf-8") as f:
-                contenido = f.read()
+            with open(ruta_archivo, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    contenido = ""
+                else:
+                    # Decodificar directamente desde el mapa de memoria, sin copia intermedia en bytes
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        contenido = str(mm, "utf-8")
+            # Normalizar saltos de línea igual que la lectura en modo texto
+            if "\r" in contenido:
+                contenido = contenido.replace("\r\n", "\n").replace("\r", "\n")
         elif ext == ".pdf":
             with open(ruta_archivo, "rb") as f:
                 pdf_reader = PyPDF2.PdfReader(f)
-                for page in pdf_reader.pages:
-                    contenido += page.extract_text() + "\n"
+                # Acumular en lista y unir una sola vez (evita copias con +=)
+                paginas = [page.extract_text() + "\n" for page in pdf_reader.pages]
+            contenido = "".join(paginas)
         else:
             raise ValueError("Formato de archivo no soportado. Solo .txt y .pdf.")
 
@@ -5,7 +5,7 @@ Lee documentos de una colección origen, traduce cada línea del español al ing
 mediante llamadas a la API de Ollama, y almacena las traducciones en una nueva colección.
 
 El script maneja errores durante la traducción y salta líneas vacías o irrelevantes
-para optimizar el proceso.
+(sin letras: solo números, puntuación o espacios) para optimizar el proceso.
 
 Uso:
     python 2-traducir_desde_mongodb.py
@@ -13,6 +13,7 @@ Uso:
 Dependencias:
     - requests: Para realizar peticiones HTTP a la API de Ollama
     - pymongo: Para la conexión y operaciones con MongoDB
+    - db_utils.py: Cliente MongoDB compartido (en este mismo directorio)
     - Ollama: Debe estar ejecutándose localmente en https://localhost:11434
     - Modelo Ollama: 'gemma3:4b' (o similar, ajustar en el código si es necesario)
 
@@ -27,9 +28,15 @@ Estructura de documentos:
     - Destino: {"_id": int, "linea": str} (con traducción o contenido original si no traducible)
 """
 
+import re
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json  # Ya no es necesario aquí, pero se mantiene por si acaso
-from pymongo import MongoClient
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from db_utils import get_client
+from pymongo.errors import BulkWriteError
 
 # Constantes para idiomas
 IDIOMA_EN = "en"
@@ -43,6 +50,44 @@ DIRECCION_ES_EN = (IDIOMA_ES, IDIOMA_EN)
 DATABASE_NAME = "traducciones"
 COLECCION_NAME = "el_quijote"  # Puedes cambiar esto por el nombre de tu colección
 
+# Caché persistente de traducciones (base de datos aparte para no mezclarla con los libros)
+CACHE_DATABASE_NAME = "traducciones_cache"
+CACHE_COLECCION_NAME = "ollama_cache"
+
+# Modelo de Ollama (forma parte de la clave de caché: cambiarlo no reutiliza traducciones de otro modelo)
+MODEL_NAME = "gemma3:4b"
+
+# Concurrencia de peticiones a Ollama y tamaño de lote para guardar en MongoDB
+MAX_WORKERS = 8
+TAMANO_LOTE = 1000
+
+# Líneas agrupadas en cada petición a Ollama (prompt numerado)
+LINEAS_POR_PETICION = 10
+_LINEA_NUMERADA = re.compile(r'^\s*(\d+)\.\s*(.+)$', re.M)
+
+# Líneas sin letras (vacías, espacios, números o puntuación): no se envían a Ollama
+_NO_TRADUCIBLE = re.compile(r'^[\W\d_]*$')
+
+# Plantillas de prompt precalculadas
+PROMPT_ES_EN = "Translate the following text from Spanish to English. Provide only the English translation, without explanations or additional modifications:\n\n{}"
+PROMPT_EN_ES = "Traduce el siguiente texto del inglés al español. Proporciona únicamente la traducción al español, sin explicaciones ni modificaciones adicionales:\n\n{}"
+
+# Plantillas por dirección de traducción (una sola búsqueda por llamada)
+PROMPTS = {
+    DIRECCION_ES_EN: PROMPT_ES_EN,
+    DIRECCION_EN_ES: PROMPT_EN_ES
+}
+PROMPTS_LOTE = {
+    DIRECCION_ES_EN: "Translate each numbered line from Spanish to English. Keep the numbering and provide only the English translations, one per line, without explanations or additional modifications:",
+    DIRECCION_EN_ES: "Traduce cada línea numerada del inglés al español. Conserva la numeración y proporciona únicamente las traducciones al español, una por línea, sin explicaciones ni modificaciones adicionales:"
+}
+
+# Sesión HTTP compartida (keep-alive) para todas las peticiones a Ollama,
+# con un pool de conexiones suficiente para los hilos de traducción
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                                     max_retries=Retry(total=2, backoff_factor=0.2)))
+
 def traducir_con_ollama(texto: str, idioma_origen: str, idioma_destino: str) -> str:
     """
     Traduce un texto usando Ollama.
@@ -51,23 +96,29 @@ def traducir_con_ollama(texto: str, idioma_origen: str, idioma_destino: str) ->
     :param idioma_destino: Idioma de destino (ej: 'es' para español, 'en' para inglés)
     :return: Traducción como cadena
     """
-    url = "http://localhost:11434/api/generate"
-
     # Crear prompt dinámico basado en los idiomas
-    if idioma_origen == IDIOMA_ES and idioma_destino == IDIOMA_EN:
-        prompt = f"Translate the following text from Spanish to English. Provide only the English translation, without explanations or additional modifications:\n\n{texto}"
-    elif idioma_origen == IDIOMA_EN and idioma_destino == IDIOMA_ES:
-        prompt = f"Traduce el siguiente texto del inglés al español. Proporciona únicamente la traducción al español, sin explicaciones ni modificaciones adicionales:\n\n{texto}"
-    else:
+    plantilla = PROMPTS.get((idioma_origen, idioma_destino))
+    if plantilla is None:
         raise ValueError(f"Dirección de traducción no soportada: {idioma_origen} -> {idioma_destino}")
 
+    return generar_con_ollama(plantilla.format(texto))
+
+
+def generar_con_ollama(prompt: str) -> str:
+    """
+    Envía un prompt a Ollama y devuelve la respuesta completa.
+    :param prompt: Prompt ya construido
+    :return: Respuesta del modelo como cadena
+    """
+    url = "http://localhost:11434/api/generate"
+
     payload = {
-        "model": "gemma3:4b",   # Cambia por el modelo que tengas disponible (ej: "mistral")
+        "model": MODEL_NAME,   # Cambia MODEL_NAME por el modelo que tengas disponible (ej: "mistral")
         "prompt": prompt,
         "stream": False      # False para obtener la salida completa de una vez
     }
 
-    response = requests.post(url, json=payload)
+    response = SESSION.post(url, json=payload)
 
     if response.status_code == 200:
         data = response.json()
@@ -76,38 +127,161 @@ def traducir_con_ollama(texto: str, idioma_origen: str, idioma_destino: str) ->
         raise Exception(f"Error en la petición: {response.status_code}, {response.text}")
 
 
+def traducir_lote_con_ollama(textos: list, idioma_origen: str, idioma_destino: str) -> list:
+    """
+    Traduce varias líneas en una sola petición a Ollama numerándolas.
+    Si la respuesta no conserva la numeración, se traduce línea a línea.
+    :param textos: Lista de textos a traducir
+    :param idioma_origen: Idioma de origen (ej: 'en' para inglés, 'es' para español)
+    :param idioma_destino: Idioma de destino (ej: 'es' para español, 'en' para inglés)
+    :return: Lista de traducciones en el mismo orden que textos
+    """
+    if len(textos) == 1:
+        return [traducir_con_ollama(textos[0], idioma_origen, idioma_destino)]
+
+    instruccion = PROMPTS_LOTE.get((idioma_origen, idioma_destino))
+    if instruccion is None:
+        raise ValueError(f"Dirección de traducción no soportada: {idioma_origen} -> {idioma_destino}")
+
+    numeradas = "\n".join(f"{n}. {texto}" for n, texto in enumerate(textos, 1))
+    respuesta = generar_con_ollama(f"{instruccion}\n\n{numeradas}")
+
+    # Cada línea no vacía debe estar numerada y en orden 1..n: una línea sin número
+    # sería parte de una traducción partida en dos y se perdería
+    numeradas = [_LINEA_NUMERADA.match(linea) for linea in respuesta.splitlines() if linea.strip()]
+    if not all(numeradas) or [int(m.group(1)) for m in numeradas] != list(range(1, len(textos) + 1)):
+        # La respuesta no encaja con las líneas enviadas: volver a una petición por línea
+        return [traducir_con_ollama(texto, idioma_origen, idioma_destino) for texto in textos]
+    return [m.group(2).strip() for m in numeradas]
+
+
+def clave_cache(texto: str, idioma_origen: str, idioma_destino: str) -> str:
+    """
+    Calcula la clave de caché de una línea (la misma que usan la GUI y traductor_documentos.py,
+    que comparten la colección de caché).
+    :return: SHA-1 hexadecimal de (modelo, idioma origen, idioma destino, texto)
+    """
+    # Espacios normalizados (igual que traductor_documentos.py): líneas que solo difieren en blancos comparten traducción
+    texto = " ".join(texto.split())
+    return hashlib.sha1(f"{MODEL_NAME}|{idioma_origen}|{idioma_destino}|{texto}".encode("utf-8")).hexdigest()
+
+
+def buscar_en_cache(cache, textos: list, idioma_origen: str, idioma_destino: str) -> dict:
+    """
+    Busca en la caché las traducciones ya conocidas de varios textos con una sola consulta.
+    :param cache: Colección de caché
+    :param textos: Lista de textos a buscar
+    :return: Diccionario {texto: traducción} con los aciertos
+    """
+    # Varios textos pueden compartir clave (solo difieren en espacios)
+    claves = {}
+    for texto in textos:
+        claves.setdefault(clave_cache(texto, idioma_origen, idioma_destino), []).append(texto)
+    return {texto: doc["traduccion"]
+            for doc in cache.find({"_id": {"$in": list(claves)}})
+            for texto in claves[doc["_id"]]}
+
+
+def guardar_en_cache(cache, textos: list, traducciones: list, idioma_origen: str, idioma_destino: str):
+    """
+    Guarda en la caché las traducciones obtenidas de Ollama.
+    :param cache: Colección de caché
+    :param textos: Textos originales
+    :param traducciones: Traducciones en el mismo orden que textos
+    """
+    documentos = {clave_cache(texto, idioma_origen, idioma_destino): traduccion
+                  for texto, traduccion in zip(textos, traducciones)}
+    try:
+        cache.insert_many([{"_id": k, "traduccion": v} for k, v in documentos.items()], ordered=False)
+    except BulkWriteError:
+        pass  # Claves ya presentes en la caché (otra ejecución las guardó antes)
+
+
+def guardar_lote(coleccion, documentos):
+    """
+    Inserta un lote de documentos traducidos y vacía la lista.
+    :param coleccion: Colección destino
+    :param documentos: Lista de documentos {"_id": int, "linea": str}
+    """
+    if not documentos:
+        return
+    try:
+        coleccion.insert_many(documentos, ordered=False)
+    except Exception as e:
+        print(f"Error al guardar el lote de {len(documentos)} líneas: {e}")
+    documentos.clear()
+
+
 # Ejemplo de uso con MongoDB
 if __name__ == "__main__":
     # Conectar a MongoDB
-    client = MongoClient("mongodb://localhost:27017/")  # Cambia la URL si es necesario
+    client = get_client()  # La URL se configura en db_utils.MONGO_URI
     db = client[DATABASE_NAME]
     collection_origen = db[COLECCION_NAME]
     collection_traducida = db[f"{COLECCION_NAME}_traducido_al_ingles"]
+    cache = client[CACHE_DATABASE_NAME][CACHE_COLECCION_NAME]
 
     # Leer documentos de la colección original
-    documentos = collection_origen.find()  # Puedes agregar filtros si es necesario
-
-    for documento in documentos:
-        linea_numero = documento["_id"]
-        linea_texto = documento["linea"]
-
-        # Saltar líneas vacías o que solo contienen saltos de línea para evitar traducciones innecesarias
-        if not linea_texto.strip() or linea_texto.strip() == "\n":
-            print(f"Línea {linea_numero}: {repr(linea_texto)} (saltada, no traducible)")
-            # Guardar el contenido original en la nueva colección
-            collection_traducida.insert_one({"_id": linea_numero, "linea": linea_texto})
-            print(f"Contenido original guardado para la línea {linea_numero}")
-            continue
-
-        # Traducir la línea del español al inglés
-        try:
-            traduccion = traducir_con_ollama(linea_texto, *DIRECCION_ES_EN)
-            print(f"Línea {linea_numero}: {linea_texto}")
-            print(f"Traducción: {traduccion}")
-            print("---")
-
-            # Guardar la traducción en la nueva colección
-            collection_traducida.insert_one({"_id": linea_numero, "linea": traduccion})
-            print(f"Traducción guardada para la línea {linea_numero}")
-        except Exception as e:
-            print(f"Error al traducir o guardar la línea {linea_numero}: {e}")
+    # Solo los campos necesarios y lotes grandes para no esperar recargas del cursor
+    documentos = collection_origen.find({}, {"_id": 1, "linea": 1}).batch_size(TAMANO_LOTE)  # Puedes agregar filtros si es necesario
+
+    pendientes = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ejecutor:
+        futuros = {}
+
+        def enviar_grupo(grupo):
+            """Resuelve desde la caché lo posible y envía el resto del grupo a Ollama."""
+            en_cache = buscar_en_cache(cache, [d["linea"] for d in grupo], *DIRECCION_ES_EN)
+            sin_traducir = []
+            for documento in grupo:
+                if documento["linea"] in en_cache:
+                    print(f"Línea {documento['_id']}: {documento['linea']} (desde caché)")
+                    pendientes.append({"_id": documento["_id"], "linea": en_cache[documento["linea"]]})
+                else:
+                    sin_traducir.append(documento)
+            if sin_traducir:
+                futuros[ejecutor.submit(traducir_lote_con_ollama, [d["linea"] for d in sin_traducir], *DIRECCION_ES_EN)] = sin_traducir
+
+        grupo = []
+        for documento in documentos:
+            linea_numero = documento["_id"]
+            linea_texto = documento["linea"]
+
+            # Saltar líneas vacías, numéricas o de solo puntuación para evitar traducciones innecesarias
+            if _NO_TRADUCIBLE.match(linea_texto):
+                print(f"Línea {linea_numero}: {repr(linea_texto)} (saltada, no traducible)")
+                # Guardar el contenido original en la nueva colección
+                pendientes.append({"_id": linea_numero, "linea": linea_texto})
+                continue
+
+            # Agrupar líneas y traducir cada grupo del español al inglés en paralelo
+            grupo.append(documento)
+            if len(grupo) == LINEAS_POR_PETICION:
+                enviar_grupo(grupo)
+                grupo = []
+        if grupo:
+            enviar_grupo(grupo)
+
+        for futuro in as_completed(futuros):
+            grupo = futuros[futuro]
+            try:
+                traducciones = futuro.result()
+            except Exception as e:
+                print(f"Error al traducir las líneas {grupo[0]['_id']}-{grupo[-1]['_id']}: {e}")
+                continue
+
+            guardar_en_cache(cache, [d["linea"] for d in grupo], traducciones, *DIRECCION_ES_EN)
+
+            for documento, traduccion in zip(grupo, traducciones):
+                print(f"Línea {documento['_id']}: {documento['linea']}")
+                print(f"Traducción: {traduccion}")
+                print("---")
+
+                # Guardar la traducción en la nueva colección
+                pendientes.append({"_id": documento["_id"], "linea": traduccion})
+
+            if len(pendientes) >= TAMANO_LOTE:
+                guardar_lote(collection_traducida, pendientes)
+
+    guardar_lote(collection_traducida, pendientes)
+    print("Traducciones guardadas")
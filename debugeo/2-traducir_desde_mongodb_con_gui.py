@@ -14,18 +14,28 @@ Dependencias:
     - PySide6: Para la interfaz gráfica
     - requests: Para realizar peticiones HTTP a la API de Ollama
     - pymongo: Para la conexión y operaciones con MongoDB
+    - db_utils.py: Cliente MongoDB compartido (en este mismo directorio)
     - Ollama: Debe estar ejecutándose localmente en https://localhost:11434
     - Modelo Ollama: 'gemma3:4b' (o similar, ajustar en el código si es necesario)
 
 Configuración de MongoDB:
-    - URL: mongodb://localhost:27017/
+    - URL: db_utils.MONGO_URI (mongodb://localhost:27017/ por defecto)
     - Base de datos: traducciones
 """
 
 import sys
+import json
+import time
+import threading
+import hashlib
+import functools
 import requests
-from pymongo import MongoClient
-from PySide6.QtWidgets import (QApplication, QMainWindow, QListWidget, QListWidgetItem,
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from db_utils import MONGO_URI, get_client, close_client
+from pymongo.errors import BulkWriteError, DuplicateKeyError, ServerSelectionTimeoutError
+from PySide6.QtWidgets import (QApplication, QMainWindow, QListWidget,
                                QPushButton, QProgressBar, QTextEdit, QVBoxLayout, QHBoxLayout,
                                QWidget, QSplitter, QMessageBox, QCheckBox, QLabel, QGroupBox, QComboBox)
 from PySide6.QtCore import QThread, Signal, QObject, QTimer
@@ -43,10 +53,58 @@ IDIOMA_NAMES = {
     IDIOMA_FR: "francés"
 }
 
+# Nombres de idiomas de origen tal como aparecen en los prompts
+IDIOMA_NAMES_ORIGEN = {
+    IDIOMA_ES: "Spanish",
+    IDIOMA_EN: "English",
+    IDIOMA_FR: "French"
+}
+
+# Plantillas de prompt precalculadas por (origen, destino)
+PROMPT_TEMPLATES = {
+    (origen, destino): f"Translate the following text from {nombre_origen} to {IDIOMA_NAMES[destino]}. Provide only the {IDIOMA_NAMES[destino]} translation, without explanations or additional modifications:\n\n{{texto}}"
+    for origen, nombre_origen in IDIOMA_NAMES_ORIGEN.items()
+    for destino in IDIOMA_NAMES
+}
+
 # Constantes para MongoDB
 DATABASE_NAME = "traducciones"
 COLECCION_NAME = "el_quijote"  # Puedes cambiar esto por el nombre de tu colección
 
+# Modelo Ollama (forma parte de la clave de caché)
+MODEL_NAME = "gemma3:4b"
+
+# Caché persistente de traducciones (base de datos aparte para no listarla como libro)
+CACHE_DATABASE_NAME = "traducciones_cache"
+CACHE_COLECCION_NAME = "ollama_cache"
+
+# Peticiones simultáneas a Ollama
+MAX_WORKERS = 8
+
+# Documentos traducidos acumulados antes de cada insert_many
+TAMANO_LOTE = 500
+
+# Documentos por lote del cursor de lectura (documentos pequeños: pocos getMore)
+CURSOR_BATCH_SIZE = 2000
+
+# Mensajes de log acumulados en el worker antes de enviarlos a la GUI
+LOG_LINEAS_POR_LOTE = 50
+LOG_INTERVALO = 0.1  # segundos
+
+# Reintentos ante errores transitorios de Ollama (también para POST, que urllib3 excluye por defecto).
+# raise_on_status=False: agotados los reintentos se devuelve la respuesta y traducir_con_ollama
+# registra el error como hasta ahora
+_RETRY_KWARGS = dict(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504),
+                     allowed_methods=frozenset(["POST"]), raise_on_status=False)
+try:
+    _RETRIES = Retry(backoff_jitter=0.2, **_RETRY_KWARGS)  # urllib3 >= 2: espera con jitter
+except TypeError:
+    _RETRIES = Retry(**_RETRY_KWARGS)
+
+# Sesión HTTP compartida por todos los hilos (keep-alive y pool de conexiones)
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=_RETRIES))
+
 def traducir_con_ollama(texto: str, idioma_origen: str, idioma_destino: str) -> str:
     """
     Traduce un texto usando Ollama.
@@ -57,116 +115,236 @@ def traducir_con_ollama(texto: str, idioma_origen: str, idioma_destino: str) ->
     """
     url = "http://localhost:11434/api/generate"
 
-    # Crear prompt dinámico basado en los idiomas
-    nombre_origen = IDIOMA_NAMES[idioma_origen]
-    nombre_destino = IDIOMA_NAMES[idioma_destino]
-
-    # Prompts en inglés para el modelo, alternando según necesidad
-    if idioma_origen == IDIOMA_ES:
-        prompt = f"Translate the following text from Spanish to {nombre_destino}. Provide only the {nombre_destino} translation, without explanations or additional modifications:\n\n{texto}"
-    elif idioma_origen == IDIOMA_EN:
-        prompt = f"Translate the following text from English to {nombre_destino}. Provide only the {nombre_destino} translation, without explanations or additional modifications:\n\n{texto}"
-    elif idioma_origen == IDIOMA_FR:
-        prompt = f"Translate the following text from French to {nombre_destino}. Provide only the {nombre_destino} translation, without explanations or additional modifications:\n\n{texto}"
-    else:
-        raise ValueError(f"Idioma de origen no soportado: {idioma_origen}")
+    # Prompts en inglés para el modelo, precalculados por dirección
+    try:
+        prompt = PROMPT_TEMPLATES[(idioma_origen, idioma_destino)].format(texto=texto)
+    except KeyError:
+        raise ValueError(f"Dirección de traducción no soportada: {idioma_origen} -> {idioma_destino}")
 
     payload = {
-        "model": "gemma3:4b",   # Cambia por el modelo que tengas disponible (ej: "mistral")
+        "model": MODEL_NAME,   # Cambia MODEL_NAME por el modelo que tengas disponible (ej: "mistral")
         "prompt": prompt,
-        "stream": False      # False para obtener la salida completa de una vez
+        "stream": True,      # Respuesta NDJSON incremental: la lectura se solapa con la generación
+        "keep_alive": "30m"  # Mantener el modelo cargado entre líneas y colecciones
     }
 
-    response = requests.post(url, json=payload)
+    with _SESSION.post(url, json=payload, timeout=(5, 120), stream=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"Error en la petición: {response.status_code}, {response.text}")
+
+        partes = []
+        for linea in response.iter_lines():
+            if not linea:
+                continue
+            fragmento = json.loads(linea)
+            # Con stream, los fallos posteriores a la cabecera 200 llegan como un objeto {"error": ...}
+            if "error" in fragmento:
+                raise Exception(f"Error en la petición: {fragmento['error']}")
+            partes.append(fragmento.get("response", ""))
+            if fragmento.get("done"):
+                return "".join(partes).strip()
+
+    # Respuesta cortada: no devolver texto parcial (acabaría en la caché)
+    raise Exception("Error en la petición: respuesta incompleta")
+
 
-    if response.status_code == 200:
-        data = response.json()
-        return data.get("response", "").strip()
-    else:
-        raise Exception(f"Error en la petición: {response.status_code}, {response.text}")
+def clave_cache(texto: str, idioma_origen: str, idioma_destino: str) -> str:
+    """
+    Calcula la clave de la caché persistente para una línea.
+    :return: SHA-1 hexadecimal de (modelo, idioma origen, idioma destino, texto)
+    """
+    # Espacios normalizados (igual que traductor_documentos.py): líneas que solo difieren en blancos comparten traducción
+    texto = " ".join(texto.split())
+    return hashlib.sha1(f"{MODEL_NAME}|{idioma_origen}|{idioma_destino}|{texto}".encode("utf-8")).hexdigest()
+
+
+def huella_origen(texto: str) -> str:
+    """
+    Calcula la huella del texto original que se guarda con cada línea traducida.
+    :return: Hash hexadecimal corto del texto de origen
+    """
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=8).hexdigest()
 
 
 class TraductionWorker(QObject):
     """Worker para ejecutar la traducción en un hilo separado"""
     progress = Signal(int)  # Progreso (0-100)
     log_message = Signal(str)  # Mensajes de log
+    log_batch = Signal(list)  # Mensajes de log agrupados
     finished = Signal()  # Finalización
     error = Signal(str)  # Errores
 
-    def __init__(self, collections_to_translate, source_lang, target_lang):
+    def __init__(self, collections_to_translate, source_lang, target_lang, db):
         super().__init__()
         self.collections_to_translate = collections_to_translate
         self.source_lang = source_lang
         self.target_lang = target_lang
         self.cancelled = False
-        self.client = MongoClient("mongodb://localhost:27017/")
-        self.db = self.client[DATABASE_NAME]
+        self._log_buf = []
+        self._log_lock = threading.Lock()
+        self._ultimo_volcado = time.monotonic()
+        self._last_progress = -1
+        # Base de datos de la ventana principal: se reutiliza su pool de conexiones
+        self.db = db
+        self.cache = db.client[CACHE_DATABASE_NAME][CACHE_COLECCION_NAME]
+        # Caché en memoria delante de la persistente: las líneas repetidas no consultan MongoDB
+        self.traducir = functools.lru_cache(maxsize=100_000)(self.traducir_con_cache)
+
+    def traducir_con_cache(self, texto):
+        """Traduce una línea consultando antes la caché persistente en MongoDB"""
+        clave = clave_cache(texto, self.source_lang, self.target_lang)
+        en_cache = self.cache.find_one({"_id": clave})
+        if en_cache:
+            return en_cache["traduccion"]
+
+        traduccion = traducir_con_ollama(texto, self.source_lang, self.target_lang)
+        if not traduccion:
+            # Una respuesta vacía no se guarda en ninguna caché (tampoco en lru_cache): se reintentará
+            raise Exception("Ollama devolvió una traducción vacía")
+        try:
+            self.cache.insert_one({"_id": clave, "traduccion": traduccion})
+        except DuplicateKeyError:
+            pass  # Otro hilo guardó la misma línea a la vez
+        return traduccion
 
     def cancel(self):
         self.cancelled = True
         self.log_message.emit("Procesamiento cancelado por el usuario")
 
+    def log(self, message):
+        """Acumula un mensaje y lo envía a la GUI por lotes (cada N mensajes o cada LOG_INTERVALO)"""
+        with self._log_lock:
+            self._log_buf.append(message)
+            if len(self._log_buf) < LOG_LINEAS_POR_LOTE and time.monotonic() - self._ultimo_volcado < LOG_INTERVALO:
+                return
+        self.volcar_log()
+
+    def volcar_log(self):
+        """Envía a la GUI los mensajes pendientes en una sola señal"""
+        with self._log_lock:
+            lote = self._log_buf
+            self._log_buf = []
+            self._ultimo_volcado = time.monotonic()
+        if lote:
+            self.log_batch.emit(lote)
+
+    def guardar_lote(self, coleccion, buffer):
+        """Inserta los documentos acumulados con insert_many y vacía el buffer"""
+        if not buffer:
+            return
+        try:
+            coleccion.insert_many(buffer, ordered=False)
+        except BulkWriteError as e:
+            for fallo in e.details.get("writeErrors", []):
+                if fallo["code"] == 11000:
+                    continue  # Ya traducida en una ejecución anterior
+                self.log(f"Error guardando línea {fallo['op']['_id']}: {fallo['errmsg']}")
+        except Exception as e:
+            self.log(f"Error guardando {len(buffer)} líneas: {e}")
+        buffer.clear()
+
     def run(self):
         total_collections = len(self.collections_to_translate)
         processed = 0
 
-        for collection_name in self.collections_to_translate:
-            if self.cancelled:
-                break
+        # Un único pool de hilos para todas las colecciones: las llamadas a Ollama se solapan
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ejecutor:
+            for collection_name in self.collections_to_translate:
+                if self.cancelled:
+                    break
 
-            self.log_message.emit(f"Procesando colección: {collection_name}")
+                self.log(f"Procesando colección: {collection_name}")
+
+                collection_origen = self.db[collection_name]
+                collection_traducida = self.db[f"{collection_name}_traducido_a_{self.target_lang}"]
+
+                # Reanudar: no se borra la colección destino, se saltan las líneas ya traducidas
+                # cuyo texto original no ha cambiado (cada traducción guarda la huella de su origen)
+                hechas = {d["_id"]: d.get("origen") for d in collection_traducida.find({}, {"_id": 1, "origen": 1})}
+                vigentes = set()
+
+                # Primera pasada: agrupar las líneas pendientes por texto para traducir cada texto una sola vez
+                ids_por_texto = {}
+                buffer = []
+                total_docs = 0
+                processed_docs = 0
+                for documento in collection_origen.find({}, projection={"_id": 1, "linea": 1}, batch_size=CURSOR_BATCH_SIZE):
+                    total_docs += 1
+                    linea_numero = documento["_id"]
+                    linea_texto = documento["linea"]
+                    huella = huella_origen(linea_texto)
+
+                    if hechas.get(linea_numero) == huella:
+                        vigentes.add(linea_numero)
+                        processed_docs += 1
+                        continue
+
+                    # Saltar líneas vacías (strip() ya elimina "\n": basta una sola comprobación)
+                    if not linea_texto.strip():
+                        buffer.append({"_id": linea_numero, "linea": linea_texto, "origen": huella})
+                        self.log(f"Línea {linea_numero}: saltada (vacía)")
+                        processed_docs += 1
+                        continue
+
+                    ids_por_texto.setdefault(linea_texto, []).append(linea_numero)
+
+                if vigentes:
+                    self.log(f"Reanudando {collection_name}: {len(vigentes)} líneas ya traducidas")
+
+                # Traducciones de un origen distinto (archivo editado o reemplazado) o de líneas que ya no existen
+                obsoletas = list(hechas.keys() - vigentes)
+                if obsoletas:
+                    collection_traducida.delete_many({"_id": {"$in": obsoletas}})
+                    self.log(f"{len(obsoletas)} líneas traducidas no coinciden con el original y se rehacen")
+
+                if total_docs == 0:
+                    self.log(f"La colección {collection_name} está vacía")
+                    continue
 
-            collection_origen = self.db[collection_name]
-            collection_traducida = self.db[f"{collection_name}_traducido_a_{self.target_lang}"]
+                repetidas = sum(len(ids) for ids in ids_por_texto.values()) - len(ids_por_texto)
+                if repetidas:
+                    self.log(f"{repetidas} líneas repetidas reutilizarán la traducción de otra")
 
-            # Limpiar colección destino si existe
-            collection_traducida.drop()
-            # _id es indexado automáticamente por MongoDB
+                # Enviar todos los textos únicos al pool antes de recoger resultados
+                futuros = {ejecutor.submit(self.traducir, texto): texto for texto in ids_por_texto}
 
-            # Obtener total de documentos para progreso parcial
-            total_docs = collection_origen.count_documents({})
-            if total_docs == 0:
-                self.log_message.emit(f"La colección {collection_name} está vacía")
-                continue
+                for futuro in as_completed(futuros):
+                    if self.cancelled:
+                        for pendiente in futuros:
+                            pendiente.cancel()
+                        break
 
-            processed_docs = 0
+                    texto = futuros[futuro]
+                    ids = ids_por_texto[texto]
+                    try:
+                        traduccion = futuro.result()
+                        huella = huella_origen(texto)
+                        buffer.extend({"_id": linea_numero, "linea": traduccion, "origen": huella}
+                                      for linea_numero in ids)
+                        self.log(f"Línea {ids[0]}: '{traduccion}'")
+                    except Exception as e:
+                        self.log(f"Error traduciendo línea {ids[0]}: {e}")
+                    processed_docs += len(ids)
 
-            for documento in collection_origen.find():
-                if self.cancelled:
-                    break
+                    # Actualizar progreso de esta colección
+                    collection_progress = int((processed_docs / total_docs) * 100)
+                    overall_progress = int(((processed + collection_progress / 100) / total_collections) * 100)
+                    if overall_progress != self._last_progress:
+                        self._last_progress = overall_progress
+                        self.progress.emit(overall_progress)
 
-                linea_numero = documento["_id"]
-                linea_texto = documento["linea"]
+                    if len(buffer) >= TAMANO_LOTE:
+                        self.guardar_lote(collection_traducida, buffer)
 
-                # Saltar líneas vacías
-                if not linea_texto.strip() or linea_texto.strip() == "\n":
-                    try:
-                        collection_traducida.insert_one({"_id": linea_numero, "linea": linea_texto})
-                        self.log_message.emit(f"Línea {linea_numero}: saltada (vacía)")
-                    except Exception as e:
-                        self.log_message.emit(f"Error guardando línea {linea_numero}: {e}")
-                    processed_docs += 1
-                    continue
+                # Guardar lo pendiente (también si se canceló, para no perder lo ya traducido)
+                self.guardar_lote(collection_traducida, buffer)
 
-                # Traducir la línea
-                try:
-                    traduccion = traducir_con_ollama(linea_texto, self.source_lang, self.target_lang)
-                    collection_traducida.insert_one({"_id": linea_numero, "linea": traduccion})
-                    self.log_message.emit(f"Línea {linea_numero}: '{traduccion}'")
-                    processed_docs += 1
-                except Exception as e:
-                    self.log_message.emit(f"Error traduciendo línea {linea_numero}: {e}")
-                    processed_docs += 1
-
-                # Actualizar progreso de esta colección
-                collection_progress = int((processed_docs / total_docs) * 100)
-                overall_progress = int(((processed + collection_progress / 100) / total_collections) * 100)
-                self.progress.emit(overall_progress)
-
-            if not self.cancelled:
-                processed += 1
-                self.log_message.emit(f"Finalizada colección {collection_name}")
+                if not self.cancelled:
+                    processed += 1
+                    self.log(f"Finalizada colección {collection_name}")
+                self.volcar_log()
 
+        self.volcar_log()
         self.progress.emit(100)
         self.finished.emit()
 
@@ -174,15 +352,34 @@ class TraductionWorker(QObject):
 class TradutorApp(QMainWindow):
     """Ventana principal de la aplicación"""
 
+    # Colores del registro por palabra clave, construidos una sola vez
+    _LOG_RULES = [
+        ("traducida", QColor(50, 205, 50)),     # Lime green
+        ("Finalizada", QColor(50, 205, 50)),
+        ("Conectado", QColor(50, 205, 50)),
+        ("Error", QColor(255, 99, 71)),         # Tomato red
+        ("cancelado", QColor(255, 99, 71)),
+        ("saltada", QColor(255, 165, 0)),       # Orange
+        ("vacía", QColor(30, 144, 255)),        # Dodger blue
+        ("Encontradas", QColor(30, 144, 255)),
+        ("Procesando", QColor(138, 43, 226)),   # Purple
+    ]
+    _DEFAULT_COLOR = QColor(211, 211, 211)      # Light gray
+
     def __init__(self):
         super().__init__()
         self.client = None
         self.db = None
         self.worker = None
         self.thread = None
+        # Volcado periódico del log del worker: las líneas terminadas se ven aunque el worker esté esperando a Ollama
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(int(LOG_INTERVALO * 1000))
+        self._log_timer.timeout.connect(self.volcar_log_worker)
         self.lang_codes = ['es', 'en', 'fr']
         self.lang_labels = ['Español (es)', 'English (en)', 'Français (fr)']
         self.known_suffixes = [f"_traducido_a_{lang}" for lang in self.lang_codes] + ["_traducido_al_ingles"]  # backward compatibility
+        self._suffix_tuple = tuple(self.known_suffixes)  # str.endswith acepta una tupla
         self.setup_ui()
         self.setup_database()
         self.load_collections()
@@ -288,6 +485,9 @@ class TradutorApp(QMainWindow):
         self.log_text.setMaximumHeight(300)  # Increased height for larger font
         log_font = QFont("Monospace", 14, QFont.Weight.Bold)
         self.log_text.setFont(log_font)
+        # Limitar el historial: Qt descarta los bloques antiguos y append no crece con la ejecución
+        self.log_text.document().setMaximumBlockCount(2000)
+        self.log_text.setUndoRedoEnabled(False)
         log_layout.addWidget(self.log_text)
 
         right_layout.addWidget(log_group)
@@ -302,24 +502,33 @@ class TradutorApp(QMainWindow):
 
     def setup_database(self):
         try:
-            self.client = MongoClient("mongodb://localhost:27017/")
+            # Cliente compartido de db_utils, también usado por el worker de traducción
+            # (sus timeouts cortos evitan que la GUI quede bloqueada 30 s en el ping)
+            self.client = get_client()
             self.db = self.client[DATABASE_NAME]
             self.client.admin.command('ping')
             self.log_message("Conectado a MongoDB")
+        except ServerSelectionTimeoutError:
+            close_client()
+            self.client = None
+            self.db = None
+            QMessageBox.critical(self, "Error de conexión",
+                                 f"No se pudo conectar a MongoDB en {MONGO_URI} (tiempo de espera agotado)")
+            self.close()
         except Exception as e:
             QMessageBox.critical(self, "Error de conexión", f"No se pudo conectar a MongoDB: {e}")
             self.close()
 
     def load_collections(self):
+        if self.db is None:
+            return
         try:
             collections = self.db.list_collection_names()
             # Filtrar solo las originales (sin sufijos de traducción)
-            original_collections = [coll for coll in collections if all(not coll.endswith(suf) for suf in self.known_suffixes)]
+            original_collections = [coll for coll in collections if not coll.endswith(self._suffix_tuple)]
 
             self.collections_list.clear()
-            for coll in sorted(original_collections):
-                item = QListWidgetItem(coll)
-                self.collections_list.addItem(item)
+            self.collections_list.addItems(sorted(original_collections))
 
             self.log_message(f"Encontradas {len(original_collections)} colecciones originales")
             if original_collections:
@@ -354,13 +563,14 @@ class TradutorApp(QMainWindow):
 
         # Crear worker y hilo
         self.thread = QThread()
-        self.worker = TraductionWorker(collections_to_translate, source_lang, target_lang)
+        self.worker = TraductionWorker(collections_to_translate, source_lang, target_lang, self.db)
         self.worker.moveToThread(self.thread)
 
         # Conectar señales
         self.thread.started.connect(self.worker.run)
         self.worker.progress.connect(self.progress_bar.setValue)
         self.worker.log_message.connect(self.log_message)
+        self.worker.log_batch.connect(self.log_messages)
         self.worker.finished.connect(self.translation_finished)
         self.worker.error.connect(self.log_message)
 
@@ -368,13 +578,19 @@ class TradutorApp(QMainWindow):
         self.start_btn.setEnabled(False)
         self.cancel_btn.setEnabled(True)
 
+        self._log_timer.start()
         self.thread.start()
 
     def cancel_translation(self):
         if self.worker:
             self.worker.cancel()
 
+    def volcar_log_worker(self):
+        if self.worker:
+            self.worker.volcar_log()
+
     def translation_finished(self):
+        self._log_timer.stop()
         if self.thread:
             self.thread.quit()
             self.thread.wait()
@@ -382,22 +598,30 @@ class TradutorApp(QMainWindow):
         self.cancel_btn.setEnabled(False)
         self.log_message("Proceso completado")
 
+    def color_mensaje(self, message):
+        # Primera regla cuya palabra clave aparece en el mensaje (mismo orden de prioridad que antes)
+        return next((color for clave, color in self._LOG_RULES if clave in message), self._DEFAULT_COLOR)
+
     def log_message(self, message):
-        if "traducida" in message or "Finalizada" in message or "Conectado" in message:
-            self.log_text.setTextColor(QColor(50, 205, 50))  # Lime green
-        elif "Error" in message or "cancelado" in message:
-            self.log_text.setTextColor(QColor(255, 99, 71))  # Tomato red
-        elif "saltada" in message:
-            self.log_text.setTextColor(QColor(255, 165, 0))  # Orange
-        elif "vacía" in message or "Encontradas" in message:
-            self.log_text.setTextColor(QColor(30, 144, 255))  # Dodger blue
-        elif "Procesando" in message:
-            self.log_text.setTextColor(QColor(138, 43, 226))  # Purple
-        else:
-            self.log_text.setTextColor(QColor(211, 211, 211))  # Light gray
-
-        self.log_text.append(message)
-        # Auto-scroll
+        self.log_messages([message])
+
+    def log_messages(self, messages):
+        # Un append por cada tramo de mensajes consecutivos del mismo color
+        tramo = []
+        color_tramo = None
+        for message in messages:
+            color = self.color_mensaje(message)
+            if tramo and color != color_tramo:
+                self.log_text.setTextColor(color_tramo)
+                self.log_text.append("\n".join(tramo))
+                tramo = []
+            tramo.append(message)
+            color_tramo = color
+        if tramo:
+            self.log_text.setTextColor(color_tramo)
+            self.log_text.append("\n".join(tramo))
+
+        # Auto-scroll (una sola vez por lote)
         scrollbar = self.log_text.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
 
@@ -407,7 +631,7 @@ class TradutorApp(QMainWindow):
             self.thread.quit()
             self.thread.wait()
         if self.client:
-            self.client.close()
+            close_client()
         event.accept()
 
 
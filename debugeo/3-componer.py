@@ -6,116 +6,259 @@ Este script extrae datos de colecciones de MongoDB que contienen "_traducido_" e
 lee el campo "linea" de cada documento y genera archivos de texto con el contenido.
 
 Uso:
-    python 3-componer.py
+    python 3-componer.py [--test [--exact-count]]
+
+    --test: modo de consola para inspeccionar las colecciones traducidas
+    --exact-count: en modo de prueba, contar los documentos exactamente en vez de estimarlos
 
 Dependencias:
     - pymongo: Para la conexión y operaciones con MongoDB
+    - db_utils.py: Cliente MongoDB compartido (en este mismo directorio)
     - PySide6: Para la interfaz gráfica
+    - reportlab: Para generar los archivos PDF
+    - PyPDF2: Para unir las partes de los PDF grandes
 """
 
 import sys
 import os
+import tempfile
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QProgressBar, QListWidget, QTextEdit, QMessageBox, QCheckBox, QFileDialog
 from PySide6.QtGui import QPalette, QColor
-from PySide6.QtCore import QThread, Signal
-from pymongo import MongoClient
+from PySide6.QtCore import QThread, Signal, QTimer
+from db_utils import get_client, close_client
+from bson import decode_all
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Paragraph
 
+# Número máximo de colecciones procesadas en paralelo
+MAX_WORKERS = 8
+
+# Agrupación de mensajes de log enviados a la GUI
+LOG_LINEAS_POR_LOTE = 50
+LOG_INTERVALO = 0.05  # segundos
+
+# Máscara para comprobar la cancelación cada 1024 documentos
+CANCEL_CHECK_MASK = 1023
+
+# Documentos por cada lote que devuelve el cursor de MongoDB
+TAMANO_LOTE_CURSOR = 5000
+
+# Lotes del cursor que se piden por adelantado mientras se escribe el archivo
+PROFUNDIDAD_PRECARGA = 2
+
+# Líneas acumuladas antes de cada escritura en el archivo de texto
+LINEAS_POR_ESCRITURA = 10000
+
+# Buffer del archivo de texto de salida
+TAMANO_BUFFER_ESCRITURA = 1 << 20
+
+# Elementos (párrafos y espaciadores) por cada parte del PDF; acota la memoria de reportlab
+ELEMENTOS_POR_PARTE_PDF = 10000
+
+
+def precargar(iterable, profundidad=PROFUNDIDAD_PRECARGA):
+    """
+    Recorre un iterable en un hilo aparte, manteniendo hasta `profundidad` elementos por delante
+    del consumidor, para solapar la espera de red de MongoDB con la escritura del archivo.
+    :param iterable: Iterable a recorrer (p. ej. un cursor de lotes BSON crudos)
+    :param profundidad: Número máximo de elementos precargados
+    :return: Generador con los mismos elementos y en el mismo orden
+    """
+    cola = queue.Queue(maxsize=profundidad)
+    detener = threading.Event()
+
+    def poner(item):
+        # Reintentar mientras el consumidor siga activo, para no bloquear el hilo si se abandona
+        while not detener.is_set():
+            try:
+                cola.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def productor():
+        try:
+            for elemento in iterable:
+                if not poner((True, elemento)):
+                    return
+            poner((False, None))
+        except Exception as e:
+            poner((False, e))
+
+    threading.Thread(target=productor, daemon=True).start()
+    try:
+        while True:
+            es_dato, valor = cola.get()
+            if not es_dato:
+                if valor is not None:
+                    raise valor
+                return
+            yield valor
+    finally:
+        # Cancelación o error del consumidor: liberar al productor
+        detener.set()
+
 
 class WorkerThread(QThread):
     """
     Hilo de trabajo para procesar las colecciones sin bloquear la GUI.
     """
     progress = Signal(int)
-    log = Signal(str)
+    log_batch = Signal(list)  # Mensajes de log agrupados
     finished_signal = Signal(bool, str)
 
-    def __init__(self, collections, db_name='traducciones', export_pdf=False, save_dir='.'):
+    def __init__(self, collections, client, db_name='traducciones', export_pdf=False, save_dir='.'):
         super().__init__()
         self.collections = collections
+        self.client = client
         self.db_name = db_name
         self.export_pdf = export_pdf
         self.save_dir = save_dir
-        self.is_cancelled = False
+        # Evento compartido por los hilos del pool para detenerse a la vez
+        self.cancel_event = threading.Event()
+        # Serializa la generación de PDF entre los hilos del pool
+        self._pdf_lock = threading.Lock()
+        self._log_buf = []
+        self._log_lock = threading.Lock()
+        self._ultimo_volcado = time.monotonic()
+        self._last_pct = -1
 
     def run(self):
         try:
-            # Conectar a MongoDB
-            client = MongoClient('mongodb://localhost:27017/')
-
-            # Buscar la base de datos correcta
-            dbs = client.list_database_names()
-            possible_dbs = ['traduciones', 'traducciones', 'translations']
-            target_db = None
-            for db_name in possible_dbs:
-                if db_name in dbs:
-                    target_db = db_name
-                    break
-
-            if not target_db:
-                raise Exception("No se encontró ninguna base de datos de traducciones")
-
-            db = client[target_db]
+            # Cliente compartido y base de datos ya resueltos por la ventana principal
+            db = self.client[self.db_name]
 
+            # Cada colección es independiente: se procesan en paralelo compartiendo el pool de MongoDB
             total = len(self.collections)
-            for i, coll_name in enumerate(self.collections, 1):
-                if self.is_cancelled:
-                    self.log.emit("Operación cancelada por el usuario.")
-                    self.finished_signal.emit(False, "Operación cancelada por el usuario.")
-                    return
-
-                self.log.emit(f"Procesando colección: {coll_name}")
-                collection = db[coll_name]
-
-                # Obtener todos los documentos
-                all_docs = list(collection.find())
-
-                # Crear un archivo de texto con el nombre de la colección
-                output_file = os.path.join(self.save_dir, f"{coll_name}.txt")
-                line_count = 0
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    for doc in all_docs:
-                        if self.is_cancelled:
-                            self.log.emit("Operación cancelada por el usuario.")
-                            self.finished_signal.emit(False, "Operación cancelada por el usuario.")
-                            return
-
-                        if 'linea' in doc:
-                            linea_content = str(doc['linea'])
-                            if linea_content.strip():  # Has actual content
-                                f.write(linea_content + '\n')
-                            else:  # Empty field = newline
-                                f.write('\n')
-                            line_count += 1
-
-                self.log.emit(f"Archivo {output_file} creado con {line_count} líneas.")
-
-                if self.export_pdf:
-                    self.log.emit(f"Generando PDF para {coll_name}...")
+            completadas = 0
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, total)) as executor:
+                futures = [executor.submit(self._procesar_coleccion, db, coll_name)
+                           for coll_name in self.collections]
+                for future in as_completed(futures):
                     try:
-                        pdf_file = os.path.join(self.save_dir, f"{coll_name}.pdf")
-                        from reportlab.lib.enums import TA_JUSTIFY, TA_CENTER
-                        from reportlab.platypus import PageBreak, Spacer, Frame
-                        from reportlab.lib.styles import ParagraphStyle
-                        from reportlab.platypus.doctemplate import PageTemplate, BaseDocTemplate
-                        from reportlab.lib.pagesizes import letter
-                        from reportlab.lib.units import inch
-
-                        # Crear estilo personalizado con justificación
-                        styles = getSampleStyleSheet()
-                        styles["Normal"].alignment = TA_JUSTIFY
-
-                        # Función para dibujar el número de página en el footer
-                        def draw_page_number(canvas, doc):
-                            canvas.saveState()
-                            canvas.setFont('Helvetica', 9)
-                            page_num = canvas.getPageNumber()
-                            text = f"Página {page_num}"
-                            canvas.drawCentredString(letter[0] / 2, 0.5 * inch, text)
-                            canvas.restoreState()
+                        future.result()
+                    except Exception:
+                        # Detener el resto de colecciones antes de propagar el error
+                        self.cancel_event.set()
+                        raise
+                    completadas += 1
+                    self._emit_progress((completadas * 100) // total)
+                    self.volcar_log()
+
+            if self.cancel_event.is_set():
+                self.log("Operación cancelada por el usuario.")
+                self.volcar_log()
+                self.finished_signal.emit(False, "Operación cancelada por el usuario.")
+                return
+
+            self.log("Procesamiento completado.")
+            self.volcar_log()
+            self.finished_signal.emit(True, f"Se procesaron {total} colecciones exitosamente.")
+        except Exception as e:
+            self.log(f"Error: {str(e)}")
+            self.volcar_log()
+            self.finished_signal.emit(False, f"Error: {str(e)}")
 
+    def _procesar_coleccion(self, db, coll_name):
+        """
+        Genera el archivo de texto (y opcionalmente el PDF) de una colección.
+        :param db: Base de datos de traducciones
+        :param coll_name: Nombre de la colección a procesar
+        :return: False si se canceló la operación, True en otro caso
+        """
+        if self.cancel_event.is_set():
+            return False
+
+        self.log(f"Procesando colección: {coll_name}")
+        collection = db[coll_name]
+
+        # Obtener solo el campo 'linea', en orden de _id (las traducciones se insertan
+        # en paralelo y el orden natural no coincide con el del texto original)
+        # Los lotes llegan en BSON crudo y se decodifican de una vez, sin pasar por el cursor documento a documento
+        lotes = (collection.find_raw_batches({}, {"_id": 0, "linea": 1})
+                 .sort("_id", 1)
+                 .batch_size(TAMANO_LOTE_CURSOR))
+        documents = (doc for lote in precargar(lotes) for doc in decode_all(lote))
+
+        # Para el PDF se guardan solo las líneas ya leídas, sin releer la colección
+        lineas_pdf = [] if self.export_pdf else None
+
+        # Crear un archivo de texto con el nombre de la colección
+        output_file = os.path.join(self.save_dir, f"{coll_name}.txt")
+        line_count = 0
+        # Acumular las líneas y escribirlas en bloques (un join y un encode por bloque), sin pasar por TextIOWrapper
+        pendientes = []
+        with open(output_file, 'wb', buffering=TAMANO_BUFFER_ESCRITURA) as f:
+            for n, doc in enumerate(documents):
+                # Comprobar la cancelación solo cada CANCEL_CHECK_MASK + 1 documentos
+                if (n & CANCEL_CHECK_MASK) == 0 and self.cancel_event.is_set():
+                    return False
+
+                if 'linea' in doc:
+                    linea_content = doc['linea']
+                    if type(linea_content) is not str:
+                        linea_content = str(linea_content)
+                    # isspace() no crea una copia como strip(); "" y solo espacios cuentan como vacías
+                    if linea_content and not linea_content.isspace():  # Has actual content
+                        pendientes.append(linea_content)
+                    else:  # Empty field = newline
+                        pendientes.append('')
+                    line_count += 1
+                    if lineas_pdf is not None:
+                        lineas_pdf.append(linea_content)
+
+                    if len(pendientes) >= LINEAS_POR_ESCRITURA:
+                        f.write(('\n'.join(pendientes) + '\n').encode('utf-8'))
+                        pendientes.clear()
+            if pendientes:
+                f.write(('\n'.join(pendientes) + '\n').encode('utf-8'))
+
+        self.log(f"Archivo {output_file} creado con {line_count} líneas.")
+
+        if self.export_pdf:
+            self.log(f"Generando PDF para {coll_name}...")
+            # La generación del PDF puede tardar: mostrar ya los mensajes pendientes
+            self.volcar_log()
+            # ReportLab no es seguro entre hilos y maquetar es CPU pura (GIL): un PDF cada vez;
+            # el resto de colecciones sigue leyendo y escribiendo su TXT en paralelo
+            with self._pdf_lock:
+                if self.cancel_event.is_set():
+                    return False
+                try:
+                    pdf_file = os.path.join(self.save_dir, f"{coll_name}.pdf")
+                    from reportlab.lib.enums import TA_JUSTIFY, TA_CENTER
+                    from reportlab.platypus import PageBreak, Spacer, Frame
+                    from reportlab.lib.styles import ParagraphStyle
+                    from reportlab.platypus.doctemplate import PageTemplate, BaseDocTemplate
+                    from reportlab.lib.pagesizes import letter
+                    from reportlab.lib.units import inch
+
+                    # Crear estilo personalizado con justificación
+                    styles = getSampleStyleSheet()
+                    styles["Normal"].alignment = TA_JUSTIFY
+
+                    # Cada parte del PDF continúa la numeración de las anteriores
+                    paginas_previas = 0
+
+                    # Función para dibujar el número de página en el footer
+                    def draw_page_number(canvas, doc):
+                        canvas.saveState()
+                        canvas.setFont('Helvetica', 9)
+                        page_num = paginas_previas + canvas.getPageNumber()
+                        text = f"Página {page_num}"
+                        canvas.drawCentredString(letter[0] / 2, 0.5 * inch, text)
+                        canvas.restoreState()
+
+                    def construir_parte(story, destino):
+                        """
+                        Genera un PDF con el template personalizado y devuelve su número de páginas.
+                        """
                         # Crear un PageTemplate personalizado
                         page_template = PageTemplate(
                             id='custom_page',
@@ -131,48 +274,84 @@ class WorkerThread(QThread):
                         )
 
                         # Crear el documento con el template personalizado
-                        pdf_template = BaseDocTemplate(pdf_file, pagesize=letter)
+                        pdf_template = BaseDocTemplate(destino, pagesize=letter)
                         pdf_template.addPageTemplates([page_template])
+                        pdf_template.build(story)
+                        return pdf_template.page
 
-                        story = []
+                    with tempfile.TemporaryDirectory() as tmp_dir:
+                        partes = []
 
                         # Add some space at the top
-                        story.append(Spacer(1, 0.25*inch))
+                        story = [Spacer(1, 0.25*inch)]
 
                         # Process documents for PDF
-                        for doc in all_docs:
-                            if 'linea' in doc:
-                                linea_content = str(doc['linea']).strip()
-                                if linea_content:
-                                    p = Paragraph(linea_content, styles["Normal"])
-                                    story.append(p)
-                                    # Add small space between paragraphs
-                                    story.append(Spacer(1, 0.1*inch))
-                                else:
-                                    # Empty document: page break
-                                    story.append(PageBreak())
-                                    story.append(Spacer(1, 0.25*inch))
-
-                        if story:
-                            pdf_template.build(story)
-                            self.log.emit(f"Archivo PDF {pdf_file} creado con números de página.")
+                        for linea in lineas_pdf:
+                            linea_content = linea.strip()
+                            if linea_content:
+                                p = Paragraph(linea_content, styles["Normal"])
+                                story.append(p)
+                                # Add small space between paragraphs
+                                story.append(Spacer(1, 0.1*inch))
+                            elif len(story) >= ELEMENTOS_POR_PARTE_PDF:
+                                # Cortar en el salto de página: la parte siguiente empieza en
+                                # página nueva, así que el resultado es idéntico al de un solo build
+                                ruta_parte = os.path.join(tmp_dir, f"parte_{len(partes)}.pdf")
+                                paginas_previas += construir_parte(story, ruta_parte)
+                                partes.append(ruta_parte)
+                                story = [Spacer(1, 0.25*inch)]
+                            else:
+                                # Empty document: page break
+                                story.append(PageBreak())
+                                story.append(Spacer(1, 0.25*inch))
+
+                        if not partes:
+                            construir_parte(story, pdf_file)
                         else:
-                            self.log.emit("No hay contenido para el PDF.")
-                    except Exception as e:
-                        self.log.emit(f"Error generando PDF: {str(e)}")
-
-                self.progress.emit(int((i / total) * 100))
-
-            self.log.emit("Procesamiento completado.")
-            self.finished_signal.emit(True, f"Se procesaron {total} colecciones exitosamente.")
-        except Exception as e:
-            self.log.emit(f"Error: {str(e)}")
-            self.finished_signal.emit(False, f"Error: {str(e)}")
-        finally:
-            client.close()
+                            ruta_parte = os.path.join(tmp_dir, f"parte_{len(partes)}.pdf")
+                            construir_parte(story, ruta_parte)
+                            partes.append(ruta_parte)
+
+                            # Unir las partes en el PDF final
+                            import PyPDF2
+                            writer = PyPDF2.PdfWriter()
+                            for ruta_parte in partes:
+                                for page in PyPDF2.PdfReader(ruta_parte).pages:
+                                    writer.add_page(page)
+                            with open(pdf_file, 'wb') as f:
+                                writer.write(f)
+
+                    self.log(f"Archivo PDF {pdf_file} creado con números de página.")
+                except Exception as e:
+                    self.log(f"Error generando PDF: {str(e)}")
+
+        return True
+
+    def _emit_progress(self, porcentaje):
+        """Emite el progreso solo cuando cambia el porcentaje entero"""
+        if porcentaje != self._last_pct:
+            self._last_pct = porcentaje
+            self.progress.emit(porcentaje)
+
+    def log(self, message):
+        """Acumula un mensaje y lo envía a la GUI por lotes (cada N mensajes o cada LOG_INTERVALO)"""
+        with self._log_lock:
+            self._log_buf.append(message)
+            if len(self._log_buf) < LOG_LINEAS_POR_LOTE and time.monotonic() - self._ultimo_volcado < LOG_INTERVALO:
+                return
+        self.volcar_log()
+
+    def volcar_log(self):
+        """Envía a la GUI los mensajes pendientes en una sola señal"""
+        with self._log_lock:
+            lote = self._log_buf
+            self._log_buf = []
+            self._ultimo_volcado = time.monotonic()
+        if lote:
+            self.log_batch.emit(lote)
 
     def cancel(self):
-        self.is_cancelled = True
+        self.cancel_event.set()
 
 
 class MainWindow(QWidget):
@@ -299,45 +478,59 @@ class MainWindow(QWidget):
         self.setLayout(layout)
 
         self.worker = None
+        # Volcado periódico del log del worker: los mensajes se ven aunque un PDF largo tarde en terminar
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(int(LOG_INTERVALO * 1000))
+        self._log_timer.timeout.connect(self.volcar_log_worker)
+        # Cliente compartido de db_utils, con su pool de conexiones, también usado por los hilos de trabajo
+        self.client = get_client()
+        self.target_db_name = None
         self.actualizar_lista()  # Cargar colecciones al iniciar
 
-    def actualizar_lista(self):
-        try:
-            client = MongoClient('mongodb://localhost:27017/')
-            dbs = client.list_database_names()
+    def _resolve_db(self):
+        """
+        Devuelve el nombre de la base de datos de traducciones, consultando al servidor solo la primera vez.
+        """
+        if self.target_db_name is None:
+            dbs = self.client.list_database_names()
 
             # Buscar la base de datos correcta
             possible_dbs = ['traduciones', 'traducciones', 'translations']
-            target_db = None
             for db_name in possible_dbs:
                 if db_name in dbs:
-                    target_db = db_name
+                    self.target_db_name = db_name
                     break
 
-            if not target_db:
+            if not self.target_db_name:
                 raise Exception("No se encontró ninguna base de datos de traducciones")
 
-            db = client[target_db]
-            collections = db.list_collection_names()
-            translated_collections = [coll for coll in collections if '_traducido_' in coll]
+        return self.target_db_name
 
+    def actualizar_lista(self):
+        try:
+            target_db = self._resolve_db()
+            db = self.client[target_db]
+            translated_collections = sorted(coll for coll in db.list_collection_names() if '_traducido_' in coll)
+
+            # Sin repintados intermedios mientras se rehace la lista
+            self.list_colecciones.setUpdatesEnabled(False)
             self.list_colecciones.clear()
             if translated_collections:
-                for coll in sorted(translated_collections):
-                    self.list_colecciones.addItem(coll)
+                self.list_colecciones.addItems(translated_collections)
+            else:
+                self.list_colecciones.addItem("No se encontraron colecciones para procesar")
+            self.list_colecciones.setUpdatesEnabled(True)
+
+            if translated_collections:
                 self.btn_procesar.setEnabled(True)
                 self.text_log.append(f"Lista actualizada desde BD '{target_db}'. {len(translated_collections)} colecciones disponibles.")
             else:
-                self.list_colecciones.addItem("No se encontraron colecciones para procesar")
                 self.btn_procesar.setEnabled(False)
                 self.text_log.append(f"BD '{target_db}' conectada, pero no hay colecciones con '_traducido_'.")
-                client.close()
         except Exception as e:
             QMessageBox.warning(self, "Error", f"No se pudo conectar a MongoDB:\n{str(e)}")
             self.btn_procesar.setEnabled(False)
             self.text_log.append(f"Error al conectar a MongoDB: {str(e)}")
-            if 'client' in locals():
-                client.close()
 
     def procesar_colecciones(self):
         selected_items = self.list_colecciones.selectedItems()
@@ -364,12 +557,21 @@ class MainWindow(QWidget):
         self.text_log.clear()
         self.text_log.append("Iniciando procesamiento...")
 
-        self.worker = WorkerThread(collections, save_dir=selected_dir, export_pdf=self.checkbox_pdf.isChecked())
+        self.worker = WorkerThread(collections, self.client, db_name=self._resolve_db(), save_dir=selected_dir, export_pdf=self.checkbox_pdf.isChecked())
         self.worker.progress.connect(self.progress_bar.setValue)
-        self.worker.log.connect(self.text_log.append)
+        self.worker.log_batch.connect(self.log_messages)
         self.worker.finished_signal.connect(self.proceso_finalizado)
+        self._log_timer.start()
         self.worker.start()
 
+    def volcar_log_worker(self):
+        if self.worker:
+            self.worker.volcar_log()
+
+    def log_messages(self, messages):
+        # Un único append por lote de mensajes
+        self.text_log.append("\n".join(messages))
+
     def cancelar_proceso(self):
         if self.worker and self.worker.isRunning():
             self.worker.cancel()
@@ -377,6 +579,7 @@ class MainWindow(QWidget):
             self.btn_cancelar.setEnabled(False)
 
     def proceso_finalizado(self, success, message):
+        self._log_timer.stop()
         self.btn_procesar.setEnabled(True)
         self.btn_cancelar.setEnabled(False)
         self.btn_cancelar.setText("Cancelar")
@@ -391,14 +594,17 @@ class MainWindow(QWidget):
 
 
 # Modo de prueba para depuración
-def test_mode():
-    """Versión de consola para testing"""
+def test_mode(exact_count=False):
+    """
+    Versión de consola para testing
+    :param exact_count: Si es True, cuenta los documentos con count_documents en lugar de la estimación
+    """
     try:
         print("=== MODO DE PRUEBA ===")
         print("Conectando a MongoDB...")
 
         # Verificar conexión básica
-        client = MongoClient('mongodb://localhost:27017/', serverSelectionTimeoutMS=5000)
+        client = get_client()
         print(f"Cliente conectado: {client}")
 
         # Listar bases de datos disponibles
@@ -416,7 +622,7 @@ def test_mode():
         if not target_db:
             print("¡ADVERTENCIA! No se encontró ninguna base de datos de traducciones.")
             print("Bases de datos encontradas:", [db for db in dbs if db != 'admin' and db != 'config' and db != 'local'])
-            client.close()
+            close_client()
             return
 
         print(f"✅ Base de datos encontrada: '{target_db}'")
@@ -436,7 +642,7 @@ def test_mode():
         if not translated_collections:
             print("No se encontraron colecciones con '_traducido_' en el nombre.")
             print("Colecciones disponibles:", collections)
-            client.close()
+            close_client()
             return
 
         print(f"\n=== Encontradas {len(translated_collections)} colecciones para procesar ===")
@@ -446,17 +652,22 @@ def test_mode():
             print(f"\n=== Inspeccionando colección: {coll_name} ===")
             collection = db[coll_name]
 
-            # Contar documentos
-            doc_count = collection.count_documents({})
-            print(f"Número de documentos: {doc_count}")
-
-            if doc_count == 0:
+            # Echar un vistazo a los primeros documentos antes de contar nada
+            primeros_docs = list(collection.find().limit(5))
+            if not primeros_docs:
                 print("¡ADVERTENCIA! La colección está vacía.")
                 continue
 
+            # Contar documentos: por defecto con los metadatos de la colección (O(1))
+            if exact_count:
+                doc_count = collection.count_documents({})
+            else:
+                doc_count = collection.estimated_document_count()
+            print(f"Número de documentos: {doc_count}")
+
             print(f"\n📄 Patrón de contenido (primeros 5 documentos):")
             total_content_lines = 0
-            for i, doc in enumerate(collection.find().limit(5)):
+            for i, doc in enumerate(primeros_docs):
                 print(f"  Documento {i+1}: ID={doc.get('_id', 'N/A')}")
                 if 'linea' in doc:
                     content = str(doc['linea']).strip()
@@ -474,14 +685,24 @@ def test_mode():
             print(f"  - Total documentos: {doc_count}")
             print(f"  - Contenido aproximado: ~{total_content_lines} líneas (basado en primeros 5 docs)")
 
-            # Calcular cuán grande debería ser viendo si hay documentos vacíos
-            empty_docs = 0
-            non_empty_docs = 0
-            for doc in collection.find():
-                if 'linea' in doc and str(doc['linea']).strip():
-                    non_empty_docs += 1
-                else:
-                    empty_docs += 1
+            # Calcular cuán grande debería ser viendo si hay documentos vacíos (conteo en el servidor)
+            con_contenido = {'$switch': {
+                'branches': [
+                    {'case': {'$eq': [{'$type': '$linea'}, 'missing']}, 'then': False},
+                    {'case': {'$eq': [{'$type': '$linea'}, 'string']},
+                     'then': {'$ne': [{'$trim': {'input': '$linea'}}, '']}},
+                ],
+                'default': True,  # Valores no textuales: str() nunca queda vacío
+            }}
+            resultado = list(collection.aggregate([
+                {'$group': {
+                    '_id': None,
+                    'total': {'$sum': 1},
+                    'no_vacios': {'$sum': {'$cond': [con_contenido, 1, 0]}},
+                }},
+            ], allowDiskUse=True))
+            non_empty_docs = resultado[0]['no_vacios'] if resultado else 0
+            empty_docs = (resultado[0]['total'] if resultado else 0) - non_empty_docs
             print(f"  - Documentos con contenido: {non_empty_docs}")
             print(f"  - Documentos vacíos: {empty_docs}")
 
@@ -489,7 +710,7 @@ def test_mode():
                 print(f"  ⚠️  ADVERTENCIA: Esperaría más documentos para '{coll_name}' (original tenía 2186 líneas)")
                 print("        ¿El proceso de traducción se completó completamente?")
 
-        client.close()
+        close_client()
         print("\n=== PRUEBA COMPLETADA ===")
 
     except Exception as e:
@@ -505,9 +726,10 @@ def test_mode():
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1 and sys.argv[1] == "--test":
-        test_mode()
+        test_mode(exact_count="--exact-count" in sys.argv)
     else:
         app = QApplication(sys.argv)
         window = MainWindow()
+        app.aboutToQuit.connect(close_client)
         window.show()
         sys.exit(app.exec())
@@ -0,0 +1,43 @@
+"""
+Utilidades compartidas de conexión a MongoDB para los scripts de depuración.
+
+Los scripts de extracción, traducción y composición obtienen aquí un único MongoClient,
+de modo que el pool de conexiones se crea una sola vez por proceso y se
+reutiliza en las inserciones por lotes y en las peticiones concurrentes.
+
+Uso:
+    from db_utils import get_client
+    db = get_client()["traducciones"]
+
+Dependencias:
+    - pymongo: Para la conexión y operaciones con MongoDB
+"""
+
+import pymongo
+
+MONGO_URI = "mongodb://localhost:27017/"
+
+_client = None
+
+
+def get_client():
+    """
+    Devuelve el MongoClient compartido, creándolo en la primera llamada.
+    :return: Instancia única de pymongo.MongoClient
+    """
+    global _client
+    if _client is None:
+        # Timeouts cortos: si MongoDB no responde, los scripts fallan en segundos y las GUI no quedan bloqueadas
+        _client = pymongo.MongoClient(MONGO_URI, maxPoolSize=64,
+                                      connectTimeoutMS=3000, serverSelectionTimeoutMS=3000)
+    return _client
+
+
+def close_client():
+    """
+    Cierra el MongoClient compartido; la siguiente llamada a get_client creará uno nuevo.
+    """
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
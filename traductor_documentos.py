@@ -16,19 +16,35 @@ Dependencias:
     - requests: Para API de Ollama
     - reportlab: Para generar PDFs
     - Ollama: Debe estar corriendo localmente en http://localhost:11434
+      (las líneas se traducen en paralelo; arrancar el servidor con, p. ej., OLLAMA_NUM_PARALLEL=4
+      y exportar la misma variable al lanzar este script para usar todos los slots)
 """
 # (El encabezado y las importaciones las mantuve iguales que en tu versión)
 import sys
 import os
 import re
+import time
+import itertools
+import hashlib
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
                                QProgressBar, QTextEdit, QMessageBox, QFileDialog, QGroupBox,
                                QListWidget, QListWidgetItem, QComboBox, QCheckBox, QSplitter, QTabWidget, QLineEdit)
-from PySide6.QtGui import QPalette, QColor, QFont
-from PySide6.QtCore import QThread, Signal, QObject
+from PySide6.QtGui import QPalette, QColor, QFont, QTextCursor
+from PySide6.QtCore import Qt, QThreadPool, QRunnable, QTimer, QSettings, QStandardPaths, Signal, QObject
 import pymongo
+from pymongo.errors import BulkWriteError
 import PyPDF2
 import requests
+from requests.adapters import HTTPAdapter
+try:
+    # orjson es opcional: serializa y parsea en C; si no está instalado se usa json estándar
+    import orjson as _json
+except ImportError:
+    import json as _json
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_JUSTIFY
@@ -38,8 +54,42 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 
 # Constantes
 DATABASE_NAME = "traducciones"
+# Caché de traducciones en una base de datos aparte, para que no aparezca en las listas de colecciones
+CACHE_DATABASE_NAME = "traducciones_cache"
+CACHE_COLECCION_NAME = "ollama_cache"
 OLLAMA_URL = "http://localhost:11434/api/generate"
+OLLAMA_TAGS_URL = "http://localhost:11434/api/tags"
+# Segundos de espera (conexión, lectura entre fragmentos de la respuesta)
+OLLAMA_TIMEOUT = (5, 120)
 MODEL_NAME = "gemma3:4b"
+# Segundos durante los que se da por buena una comprobación de Ollama correcta
+OLLAMA_CHECK_TTL = 30
+
+# Documentos por lote del cursor de origen y por insert_many de traducciones
+TAMANO_LOTE_CURSOR = 500
+TAMANO_LOTE_TRADUCCION = 256
+
+# Hilos del QThreadPool global (un trabajo a la vez más margen para tareas auxiliares)
+HILOS_POOL_QT = 4
+
+# Segundos entre comprobaciones de cancelación mientras se generan los PDF
+INTERVALO_CANCELACION_PDF = 0.2
+
+# Líneas por cada writelines al componer el TXT
+LINEAS_POR_BLOQUE = 1024
+
+# Agrupación de mensajes de log enviados a la GUI
+LOG_LINEAS_POR_LOTE = 50
+LOG_INTERVALO = 0.1  # segundos
+# Refresco de los registros en la GUI (ms) y líneas máximas que conserva cada uno
+LOG_REFRESCO_GUI_MS = 50
+MAX_LINEAS_LOG = 5000
+
+# Número de documentos por cada insert_many
+TAMANO_LOTE = 1000
+
+# Número de traducciones en vuelo a la vez; conviene que coincida con OLLAMA_NUM_PARALLEL del servidor
+OLLAMA_NUM_PARALLEL = int(os.environ.get("OLLAMA_NUM_PARALLEL", "4"))
 
 IDIOMA_CODES = ["es", "en", "fr"]
 IDIOMA_NAMES = {
@@ -48,39 +98,163 @@ IDIOMA_NAMES = {
     "fr": "Français"
 }
 
-IDIOMA_NAMES_PROMPT = {
-    "es": "español",
-    "en": "inglés",
-    "fr": "francés"
+# Nombres en inglés para los prompts
+IDIOMA_NAMES_EN = {
+    "es": "Spanish",
+    "en": "English",
+    "fr": "French"
 }
 
+PROMPT_TRADUCCION = ("Translate the following text from {origen} to {destino}. Provide only the {destino} "
+                     "translation, without explanations or additional modifications:\n\n{texto}")
+
+# Líneas por petición a Ollama (con un tope de caracteres para no alargar demasiado cada respuesta)
+LINEAS_POR_PETICION = 16
+MAX_CARACTERES_POR_PETICION = 2000
+_LINEA_NUMERADA = re.compile(r'^\s*(\d+)\.\s*(.+)$', re.M)
+
+# Saltos de línea de PDF que no cierran una frase (no van precedidos de punto)
+_SALTO_SIN_PUNTO = re.compile(r'(?<!\.)\n')
+
+# Líneas triviales que se copian sin traducir: números de página, numerales romanos, URLs y solo puntuación
+# (numerales romanos bien formados y con punto final: sin él, "I", "MI", "MIX" o "DIV" pueden ser palabras)
+_SKIP_RE = re.compile(r'^\s*(\d+|(?=[MDCLXVI])M{0,3}(CM|CD|D?C{0,3})(XC|XL|L?X{0,3})(IX|IV|V?I{0,3})\.'
+                      r'|https?://\S+|\W+)\s*$')
+
+
+# Sesión HTTP compartida: reutiliza las conexiones keep-alive con Ollama entre peticiones e hilos
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=32))
+
+_client = None
+_client_lock = threading.Lock()
+
+# Cabecera fija para los cuerpos JSON ya serializados
+_CABECERAS_JSON = {"Content-Type": "application/json"}
+
 
 # Funciones auxiliares
+def get_client():
+    """
+    Devuelve el MongoClient compartido por la ventana y los hilos de trabajo, creándolo en la primera llamada.
+    MongoClient es seguro entre hilos y mantiene su propio pool de conexiones.
+    """
+    global _client
+    if _client is None:
+        # Puede llamarse a la vez desde varios hilos del pool: crear un único cliente
+        with _client_lock:
+            if _client is None:
+                _client = pymongo.MongoClient(maxPoolSize=50)
+    return _client
+
+
 def traducir_con_ollama(texto: str, idioma_origen: str, idioma_destino: str) -> str:
     """Traduce texto usando Ollama."""
-    nombre_origen = IDIOMA_NAMES_PROMPT[idioma_origen]
-    nombre_destino = IDIOMA_NAMES_PROMPT[idioma_destino]
+    # Plantilla única: el prefijo es idéntico en cada petición de la misma dirección
+    prompt = PROMPT_TRADUCCION.format(origen=IDIOMA_NAMES_EN[idioma_origen],
+                                      destino=IDIOMA_NAMES_EN[idioma_destino],
+                                      texto=texto)
+
+    return generar_con_ollama(prompt)
 
-    prompt = ""
-    if idioma_origen == "es":
-        prompt = f"Translate the following text from Spanish to {nombre_destino}. Provide only the {nombre_destino} translation, without explanations or additional modifications:\n\n{texto}"
-    elif idioma_origen == "en":
-        prompt = f"Translate the following text from English to {nombre_destino}. Provide only the {nombre_destino} translation, without explanations or additional modifications:\n\n{texto}"
-    elif idioma_origen == "fr":
-        prompt = f"Translate the following text from French to {nombre_destino}. Provide only the {nombre_destino} translation, without explanations or additional modifications:\n\n{texto}"
 
+def generar_con_ollama(prompt: str) -> str:
+    """Envía un prompt a Ollama y devuelve la respuesta sin espacios sobrantes."""
     payload = {
         "model": MODEL_NAME,
         "prompt": prompt,
-        "stream": False
+        "stream": True
     }
 
-    response = requests.post(OLLAMA_URL, json=payload)
-    if response.status_code == 200:
-        data = response.json()
-        return data.get("response", "").strip()
-    else:
-        raise Exception(f"Error en petición Ollama: {response.status_code}")
+    # Respuesta NDJSON incremental: se decodifica a medida que el modelo genera
+    # Timeout (conexión, lectura entre fragmentos): un Ollama bloqueado no deja colgado al trabajo
+    with _SESSION.post(OLLAMA_URL, data=_json.dumps(payload), headers=_CABECERAS_JSON, stream=True,
+                       timeout=OLLAMA_TIMEOUT) as response:
+        if response.status_code != 200:
+            raise Exception(f"Error en petición Ollama: {response.status_code}")
+
+        partes = []
+        for linea in response.iter_lines():
+            if not linea:
+                continue
+            fragmento = _json.loads(linea)
+            # Con stream, los fallos posteriores a la cabecera 200 llegan como un objeto {"error": ...}
+            if "error" in fragmento:
+                raise Exception(f"Error en petición Ollama: {fragmento['error']}")
+            partes.append(fragmento.get("response", ""))
+            if fragmento.get("done"):
+                return "".join(partes).strip()
+
+    # Respuesta cortada: no devolver texto parcial (acabaría en la caché)
+    raise Exception("Error en petición Ollama: respuesta incompleta")
+
+
+def traducir_lote_con_ollama(textos: list, idioma_origen: str, idioma_destino: str) -> list:
+    """
+    Traduce varias líneas en una sola petición a Ollama numerándolas.
+    Si la respuesta no conserva la numeración, se traduce línea a línea.
+    """
+    if len(textos) == 1:
+        return [traducir_con_ollama(textos[0], idioma_origen, idioma_destino)]
+
+    nombre_origen = IDIOMA_NAMES_EN[idioma_origen]
+    nombre_destino = IDIOMA_NAMES_EN[idioma_destino]
+    numeradas = "\n".join(f"{n}. {texto}" for n, texto in enumerate(textos, 1))
+    prompt = (f"Translate each numbered line from {nombre_origen} to {nombre_destino}. Keep the numbering and "
+              f"provide only the {nombre_destino} translations, one per line, without explanations or "
+              f"additional modifications:\n\n{numeradas}")
+    respuesta = generar_con_ollama(prompt)
+
+    # Cada línea no vacía debe estar numerada y en orden 1..n: una línea sin número
+    # sería parte de una traducción partida en dos y se perdería
+    numeradas = [_LINEA_NUMERADA.match(linea) for linea in respuesta.splitlines() if linea.strip()]
+    if not all(numeradas) or [int(m.group(1)) for m in numeradas] != list(range(1, len(textos) + 1)):
+        # La respuesta no encaja con las líneas enviadas: volver a una petición por línea
+        return [traducir_con_ollama(texto, idioma_origen, idioma_destino) for texto in textos]
+    return [m.group(2).strip() for m in numeradas]
+
+
+def guardar_lote(coleccion, documentos):
+    """Inserta un lote de documentos traducidos con un solo insert_many y vacía la lista."""
+    if documentos:
+        coleccion.insert_many(documentos, ordered=False)
+        documentos.clear()
+
+
+def clave_cache(texto: str, idioma_origen: str, idioma_destino: str) -> str:
+    """Clave de caché de una línea para el modelo y la dirección de traducción."""
+    # Espacios normalizados: líneas que solo difieren en blancos comparten traducción
+    texto = " ".join(texto.split())
+    return hashlib.sha1(f"{MODEL_NAME}|{idioma_origen}|{idioma_destino}|{texto}".encode("utf-8")).hexdigest()
+
+
+def traducir_lote_con_cache(cache, textos: list, idioma_origen: str, idioma_destino: str) -> list:
+    """
+    Traduce varias líneas resolviendo primero desde la caché (una sola consulta)
+    y enviando a Ollama solo las que no estén en ella.
+    """
+    claves = [clave_cache(texto, idioma_origen, idioma_destino) for texto in textos]
+    en_cache = {doc["_id"]: doc["traduccion"] for doc in cache.find({"_id": {"$in": claves}})}
+
+    # Una sola petición por clave aunque se repita dentro del lote
+    primera = {}
+    for n, clave in enumerate(claves):
+        if clave not in en_cache:
+            primera.setdefault(clave, n)
+    pendientes = list(primera.values())
+    if pendientes:
+        nuevas = traducir_lote_con_ollama([textos[n] for n in pendientes], idioma_origen, idioma_destino)
+        documentos = {claves[n]: traduccion for n, traduccion in zip(pendientes, nuevas)}
+        # Las traducciones vacías se usan en esta ejecución pero no se guardan en la caché
+        a_guardar = [{"_id": k, "traduccion": v} for k, v in documentos.items() if v]
+        if a_guardar:
+            try:
+                cache.insert_many(a_guardar, ordered=False)
+            except BulkWriteError:
+                pass  # Claves ya guardadas por otra petición concurrente
+        en_cache.update(documentos)
+
+    return [en_cache[clave] for clave in claves]
 
 
 def segmentar_frases(ruta_archivo: str):
@@ -90,17 +264,23 @@ def segmentar_frases(ruta_archivo: str):
 
     ext = os.path.splitext(ruta_archivo)[1].lower()
     if ext == ".txt":
+        # Lectura línea a línea: no se construye el contenido completo como una sola cadena
+        ultima = "\n"
         with open(ruta_archivo, "r", encoding="utf-8") as f:
-            contenido = f.read()
-        frases = contenido.split('\n')
+            for ultima in f:
+                frases.append(ultima.rstrip("\n"))
+        # Igual que split('\n'): un salto final (o un archivo vacío) deja una última línea vacía
+        if ultima.endswith("\n"):
+            frases.append("")
     elif ext == ".pdf":
         with open(ruta_archivo, "rb") as f:
             pdf_reader = PyPDF2.PdfReader(f)
-            for page in pdf_reader.pages:
-                contenido += (page.extract_text() or "") + "\n"
+            # Acumular en lista y unir una sola vez (evita copias con +=)
+            paginas = [(page.extract_text() or "") + "\n" for page in pdf_reader.pages]
+        contenido = "".join(paginas)
 
         # Para PDFs, reemplazar saltos de línea que no están precedidos por un punto con espacios
-        contenido = re.sub(r'(?<!\.)\n', ' ', contenido)
+        contenido = _SALTO_SIN_PUNTO.sub(' ', contenido)
 
         frases = contenido.split('\n')
     else:
@@ -110,21 +290,94 @@ def segmentar_frases(ruta_archivo: str):
 
 
 # Hilos de trabajo
-class ExtractionWorker(QObject):
+class WorkerSignals(QObject):
+    """Señales de un trabajo del pool (QRunnable no es un QObject y no puede declararlas)."""
     progress = Signal(int)
-    log = Signal(str)
+    log_batch = Signal(list)
     finished = Signal(bool, str)
 
-    def __init__(self, file_path):
+
+class WorkerBase(QRunnable):
+    """
+    Base de los trabajos que se ejecutan en el QThreadPool global: agrupa los mensajes
+    de log y descarta los avisos de progreso repetidos para no saturar el hilo de la GUI.
+    """
+
+    def __init__(self, signals):
+        super().__init__()
+        # Señales compartidas por todos los trabajos del mismo tipo (conectadas una vez en la ventana)
+        self.signals = signals
+        # La ventana conserva la referencia hasta on_worker_finished; el pool no debe borrarlo
+        self.setAutoDelete(False)
+        # Cancelación cooperativa: los bucles de cada trabajo la consultan entre unidades de trabajo
+        self.cancel_event = threading.Event()
+        self._log_buf = []
+        self._ultimo_volcado = time.monotonic()
+        self._last_pct = -1
+
+    def registrar(self, message):
+        """Acumula un mensaje y lo envía como un solo bloque cada LOG_LINEAS_POR_LOTE mensajes o LOG_INTERVALO segundos."""
+        self._log_buf.append(message)
+        if len(self._log_buf) >= LOG_LINEAS_POR_LOTE or time.monotonic() - self._ultimo_volcado >= LOG_INTERVALO:
+            self.volcar_log()
+
+    def volcar_log(self):
+        """Envía los mensajes pendientes en una sola señal."""
+        if self._log_buf:
+            # Se entrega la lista y se empieza otra: la GUI la recibe sin copiarla
+            self.signals.log_batch.emit(self._log_buf)
+            self._log_buf = []
+        self._ultimo_volcado = time.monotonic()
+
+    def actualizar_progreso(self, porcentaje):
+        """Emite el progreso solo cuando cambia el porcentaje entero."""
+        if porcentaje != self._last_pct:
+            self._last_pct = porcentaje
+            self.signals.progress.emit(porcentaje)
+
+    def terminar(self, success, message):
+        """Vacía el log pendiente y emite la señal de fin."""
+        self.volcar_log()
+        self.signals.finished.emit(success, message)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+class LoadSignals(QObject):
+    done = Signal(list)
+    error = Signal(str)
+    finished = Signal()
+
+
+class LoadRunnable(QRunnable):
+    """Consulta corta (p. ej. listar colecciones) en el pool; el resultado llega a la GUI por señal."""
+
+    def __init__(self, fetch):
         super().__init__()
+        self.fetch = fetch
+        self.signals = LoadSignals()
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            self.signals.done.emit(self.fetch())
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        finally:
+            self.signals.finished.emit()
+
+
+class ExtractionWorker(WorkerBase):
+    def __init__(self, signals, file_path):
+        super().__init__(signals)
         self.file_path = file_path
-        self.cancelled = False
 
     def run(self):
         try:
             frases = segmentar_frases(self.file_path)
 
-            client = pymongo.MongoClient()
+            client = get_client()
             db = client[DATABASE_NAME]
             base = os.path.basename(self.file_path)
             coleccion_nombre = os.path.splitext(base)[0]
@@ -132,230 +385,318 @@ class ExtractionWorker(QObject):
             coleccion.delete_many({})
 
             total = len(frases)
-            for i, frase in enumerate(frases, 1):
-                if self.cancelled:
-                    client.close()
-                    self.finished.emit(False, "Extracción cancelada.")
+            for inicio in range(0, total, TAMANO_LOTE):
+                if self.cancel_event.is_set():
+                    self.terminar(False, "Extracción cancelada.")
                     return
-                coleccion.insert_one({"_id": i, "linea": frase})
-                self.progress.emit(int((i / total) * 100))
-                self.log.emit(f"Línea {i} procesada.")
 
-            client.close()
-            self.finished.emit(True, f"Extracción completada. {total} líneas guardadas en '{coleccion_nombre}'.")
-        except Exception as e:
-            self.finished.emit(False, f"Error extracción: {str(e)}")
+                # Lotes en orden ascendente de _id: la colección está vacía y la inserción es secuencial
+                lote = [{"_id": i, "linea": frase}
+                        for i, frase in enumerate(frases[inicio:inicio + TAMANO_LOTE], inicio + 1)]
+                coleccion.insert_many(lote, ordered=True)
 
-    def cancel(self):
-        self.cancelled = True
+                # Progreso y log una vez por lote, no por línea
+                procesadas = inicio + len(lote)
+                self.actualizar_progreso(int((procesadas / total) * 100))
+                self.registrar(f"Procesadas {procesadas}/{total} líneas.")
 
+            self.terminar(True, f"Extracción completada. {total} líneas guardadas en '{coleccion_nombre}'.")
+        except Exception as e:
+            self.terminar(False, f"Error extracción: {str(e)}")
 
-class TranslationWorker(QObject):
-    progress = Signal(int)
-    log = Signal(str)
-    finished = Signal(bool, str)
 
-    def __init__(self, collections, source_lang, target_lang):
-        super().__init__()
+class TranslationWorker(WorkerBase):
+    def __init__(self, signals, collections, source_lang, target_lang):
+        super().__init__(signals)
         self.collections = collections
         self.source_lang = source_lang
         self.target_lang = target_lang
-        self.cancelled = False
 
     def run(self):
         try:
-            client = pymongo.MongoClient()
+            client = get_client()
             db = client[DATABASE_NAME]
+            cache = client[CACHE_DATABASE_NAME][CACHE_COLECCION_NAME]
             total_collections = len(self.collections)
             processed = 0
 
-            for collection_name in self.collections:
-                if self.cancelled:
-                    client.close()
-                    self.finished.emit(False, "Traducción cancelada.")
-                    return
+            # Peticiones simultáneas a Ollama (ajustar junto a OLLAMA_NUM_PARALLEL en el servidor)
+            with ThreadPoolExecutor(max_workers=OLLAMA_NUM_PARALLEL) as executor:
+                for collection_name in self.collections:
+                    if self.cancel_event.is_set():
+                        self.terminar(False, "Traducción cancelada.")
+                        return
 
-                self.log.emit(f"Traduciendo colección: {collection_name}")
-                collection_origen = db[collection_name]
-                collection_destino = db[f"{collection_name}_traducido_a_{self.target_lang}"]
-                collection_destino.drop()
+                    self.registrar(f"Traduciendo colección: {collection_name}")
+                    collection_origen = db[collection_name]
+                    collection_destino = db[f"{collection_name}_traducido_a_{self.target_lang}"]
+                    collection_destino.drop()
 
-                total_docs = collection_origen.count_documents({})
-                processed_docs = 0
+                    # Solo se usa para el progreso: basta con el recuento de los metadatos (O(1))
+                    total_docs = collection_origen.estimated_document_count()
+                    processed_docs = 0
 
-                for documento in collection_origen.find():
-                    if self.cancelled:
-                        client.close()
-                        self.finished.emit(False, "Traducción cancelada.")
-                        return
-
-                    linea_numero = documento["_id"]
-                    linea_texto = documento["linea"]
-
-                    if not linea_texto.strip():
-                        collection_destino.insert_one({"_id": linea_numero, "linea": linea_texto})
-                        processed_docs += 1
-                        self.log.emit(f"Línea {linea_numero}: SKIP (vacía)")
-                    elif linea_texto.strip():
-                        traduccion = traducir_con_ollama(linea_texto, self.source_lang, self.target_lang)
-                        collection_destino.insert_one({"_id": linea_numero, "linea": traduccion})
-                        processed_docs += 1
-                        # Truncate long translations for display
-                        display_traduccion = traduccion[:80] + "..." if len(traduccion) > 80 else traduccion
-                        self.log.emit(f"Línea {linea_numero}: '{display_traduccion}'")
-
-                        # Emit progress after each translation
-                        collection_progress = int((processed_docs / total_docs) * 100) if total_docs > 0 else 100
-                        overall_progress = min(100, int((processed * 100 + collection_progress) / total_collections))
-                        self.progress.emit(overall_progress)
-                    # Handle empty lines too
-                    if not linea_texto.strip():
-                        processed_docs += 1
-                        # Emit progress after each processed document
-                        collection_progress = int((processed_docs / total_docs) * 100) if total_docs > 0 else 100
+                    def emitir_progreso():
+                        collection_progress = min(100, int((processed_docs / total_docs) * 100)) if total_docs > 0 else 100
                         overall_progress = min(100, int((processed * 100 + collection_progress) / total_collections))
-                        self.progress.emit(overall_progress)
+                        self.actualizar_progreso(overall_progress)
+
+                    # Las líneas vacías o triviales se copian tal cual; el resto se agrupa y se envía a Ollama en paralelo
+                    futures = {}
+                    pendientes = []  # Documentos traducidos a la espera de insert_many
+                    grupo = []
+                    caracteres_grupo = 0
+
+                    def enviar_grupo():
+                        textos = [texto for _, texto in grupo]
+                        future = executor.submit(traducir_lote_con_cache, cache, textos, self.source_lang, self.target_lang)
+                        futures[future] = [numero for numero, _ in grupo]
+
+                    cursor = (collection_origen.find({}, projection={"linea": 1}, sort=[("_id", 1)])
+                              .batch_size(TAMANO_LOTE_CURSOR))
+                    for documento in cursor:
+                        if self.cancel_event.is_set():
+                            break
+
+                        linea_numero = documento["_id"]
+                        linea_texto = documento["linea"]
+
+                        vacia = not linea_texto.strip()
+                        if vacia or _SKIP_RE.match(linea_texto):
+                            pendientes.append({"_id": linea_numero, "linea": linea_texto})
+                            if len(pendientes) >= TAMANO_LOTE_TRADUCCION:
+                                guardar_lote(collection_destino, pendientes)
+                            processed_docs += 1
+                            self.registrar(f"Línea {linea_numero}: SKIP ({'vacía' if vacia else 'trivial'})")
+                            emitir_progreso()
+                            continue
+
+                        if grupo and caracteres_grupo + len(linea_texto) > MAX_CARACTERES_POR_PETICION:
+                            enviar_grupo()
+                            grupo = []
+                            caracteres_grupo = 0
+                        grupo.append((linea_numero, linea_texto))
+                        caracteres_grupo += len(linea_texto)
+                        if len(grupo) == LINEAS_POR_PETICION:
+                            enviar_grupo()
+                            grupo = []
+                            caracteres_grupo = 0
+                    if grupo and not self.cancel_event.is_set():
+                        enviar_grupo()
+
+                    for future in as_completed(futures):
+                        if self.cancel_event.is_set():
+                            for pendiente in futures:
+                                pendiente.cancel()
+                            guardar_lote(collection_destino, pendientes)
+                            self.terminar(False, "Traducción cancelada.")
+                            return
+
+                        numeros = futures[future]
+                        try:
+                            traducciones = future.result()
+                        except Exception:
+                            # No esperar al resto de la colección antes de informar del error
+                            for pendiente in futures:
+                                pendiente.cancel()
+                            raise
+                        for linea_numero, traduccion in zip(numeros, traducciones):
+                            pendientes.append({"_id": linea_numero, "linea": traduccion})
+                            processed_docs += 1
+                            # Truncate long translations for display
+                            display_traduccion = traduccion[:80] + "..." if len(traduccion) > 80 else traduccion
+                            self.registrar(f"Línea {linea_numero}: '{display_traduccion}'")
+
+                        if len(pendientes) >= TAMANO_LOTE_TRADUCCION:
+                            guardar_lote(collection_destino, pendientes)
+
+                        # Emit progress after each translated group
+                        emitir_progreso()
+
+                    guardar_lote(collection_destino, pendientes)
+
+                    if self.cancel_event.is_set():
+                        self.terminar(False, "Traducción cancelada.")
+                        return
 
-                processed += 1
-                self.log.emit(f"Finalizada colección {collection_name}")
+                    processed += 1
+                    self.registrar(f"Finalizada colección {collection_name}")
 
-                # Emit final progress for completed collection
-                overall_progress = min(100, int((processed * 100) / total_collections))
-                self.progress.emit(overall_progress)
+                    # Emit final progress for completed collection
+                    overall_progress = min(100, int((processed * 100) / total_collections))
+                    self.actualizar_progreso(overall_progress)
 
-            client.close()
-            self.finished.emit(True, "Traducción completada.")
+            self.terminar(True, "Traducción completada.")
         except Exception as e:
-            self.finished.emit(False, f"Error traducción: {str(e)}")
-
-    def cancel(self):
-        self.cancelled = True
-
+            self.terminar(False, f"Error traducción: {str(e)}")
 
-class CompositionWorker(QObject):
-    progress = Signal(int)
-    log = Signal(str)
-    finished = Signal(bool, str)
 
-    def __init__(self, collections, save_dir, export_pdf):
-        super().__init__()
+class CompositionWorker(WorkerBase):
+    def __init__(self, signals, collections, save_dir, export_pdf):
+        super().__init__(signals)
         self.collections = collections
         self.save_dir = save_dir
         self.export_pdf = export_pdf
-        self.cancelled = False
 
     def run(self):
+        pdf_pool = None
         try:
-            client = pymongo.MongoClient()
+            client = get_client()
             db = client[DATABASE_NAME]
             total = len(self.collections)
 
-            for i, coll_name in enumerate(self.collections, 1):
-                if self.cancelled:
-                    client.close()
-                    self.finished.emit(False, "Composición cancelada.")
+            # Un paso por TXT y, si se exportan, otro por cada PDF
+            pasos_totales = total * 2 if self.export_pdf else total
+            pasos_hechos = 0
+            futures = {}
+            if self.export_pdf:
+                # spawn: no se hace fork de un proceso con hilos (Qt, pool de pymongo, QThreadPool)
+                pdf_pool = ProcessPoolExecutor(max_workers=min(total, os.cpu_count() or 1),
+                                               mp_context=multiprocessing.get_context("spawn"))
+
+            for coll_name in self.collections:
+                if self.cancel_event.is_set():
+                    self.terminar(False, "Composición cancelada.")
                     return
 
-                self.log.emit(f"Procesando colección: {coll_name}")
+                self.registrar(f"Procesando colección: {coll_name}")
                 collection = db[coll_name]
-                all_docs = list(collection.find(sort=[("_id", 1)]))
+                cursor = (collection.find({}, projection={"_id": 0, "linea": 1}, sort=[("_id", 1)])
+                          .batch_size(TAMANO_LOTE_CURSOR))
+                lineas = (str(doc['linea']) for doc in cursor if 'linea' in doc)
+                if self.export_pdf:
+                    # El PDF vuelve a recorrer las líneas: guardar solo el texto, no los documentos
+                    lineas = list(lineas)
 
                 output_file = os.path.join(self.save_dir, f"{coll_name}.txt")
                 try:
                     with open(output_file, 'w', encoding='utf-8') as f:
-                        for doc in all_docs:
-                            if self.cancelled:
-                                client.close()
-                                self.finished.emit(False, "Composición cancelada.")
+                        iterador = iter(lineas)
+                        while True:
+                            bloque = list(itertools.islice(iterador, LINEAS_POR_BLOQUE))
+                            if not bloque:
+                                break
+                            # Cancelación comprobada una vez por bloque; cada bloque se escribe con un solo writelines
+                            if self.cancel_event.is_set():
+                                self.terminar(False, "Composición cancelada.")
                                 return
-                            if 'linea' in doc:
-                                linea_content = str(doc['linea'])
-                                f.write(linea_content + '\n')
-                    self.log.emit(f"Archivo TXT creado: {output_file}")
+                            f.writelines(f"{linea}\n" for linea in bloque)
+                    self.registrar(f"Archivo TXT creado: {output_file}")
                 except Exception as e:
-                    self.log.emit(f"Error creando TXT '{output_file}': {str(e)}")
+                    self.registrar(f"Error creando TXT '{output_file}': {str(e)}")
                     # continue to try PDF creation (or next collection)
 
+                pasos_hechos += 1
                 if self.export_pdf:
-                    try:
-                        pdf_file = os.path.join(self.save_dir, f"{coll_name}.pdf")
-
-                        # Crear un estilo personalizado con justificación (no sobrescribimos el stylesheet global)
-                        styles = getSampleStyleSheet()
-                        body_style = ParagraphStyle(
-                            'CustomBody',
-                            parent=styles['BodyText'],
-                            fontName="Helvetica",
-                            fontSize=12,
-                            alignment=TA_JUSTIFY,
-                            leading=14
-                        )
-
-                        # Función para dibujar el número de página en el footer
-                        def draw_page_number(canvas, doc):
-                            try:
-                                canvas.setFont('Helvetica', 10)
-                                page_num = canvas.getPageNumber()
-                                text = f"Página {page_num}"
-                                canvas.drawRightString(letter[0] - 0.5 * inch, 0.75 * inch, text)
-                            except Exception as e:
-                                # Logger del hilo (no arrojar excepción a ReportLab)
-                                self.log.emit(f"Error en draw_page_number: {str(e)}")
-
-                        # Crear el documento con SimpleDocTemplate (callbacks se pasan a build)
-                        pdf_template = SimpleDocTemplate(
-                            pdf_file,
-                            pagesize=letter,
-                            leftMargin=0.5*inch,
-                            rightMargin=0.5*inch,
-                            topMargin=0.75*inch,
-                            bottomMargin=1*inch
-                        )
-
-                        story = []
-
-                        # Add some space at the top
-                        story.append(Spacer(1, 0.25*inch))
-
-                        num_paragraphs = 0
-                        for doc in all_docs:
-                            if 'linea' in doc:
-                                linea_content = str(doc['linea']).strip()
-                                if linea_content:
-                                    p = Paragraph(linea_content, body_style)
-                                    story.append(p)
-                                    story.append(Spacer(1, 0.1*inch))
-                                    num_paragraphs += 1
-
-                        if num_paragraphs == 0:
-                            # Agregar mensaje por defecto si no hay contenido
-                            p = Paragraph("No hay contenido disponible.", body_style)
-                            story.append(p)
-
-                        self.log.emit(f"Preparado PDF con {num_paragraphs} párrafos.")
-                        self.log.emit(f"Generando PDF - export_pdf: {self.export_pdf}, len(story): {len(story)}")
-
-                        # Aquí pasamos los callbacks a build (corrección clave)
-                        pdf_template.build(story, onFirstPage=draw_page_number, onLaterPages=draw_page_number)
-
-                        # Verificar que el archivo exista y tenga tamaño
-                        if os.path.exists(pdf_file) and os.path.getsize(pdf_file) > 0:
-                            self.log.emit(f"Archivo PDF creado: {pdf_file}")
-                        else:
-                            self.log.emit(f"PDF creado pero está vacío o no existe: {pdf_file}")
+                    # El PDF se maqueta en otro proceso mientras se sigue con la siguiente colección
+                    futures[pdf_pool.submit(build_pdf, coll_name, lineas, self.save_dir)] = coll_name
+                self.actualizar_progreso(int((pasos_hechos / pasos_totales) * 100))
+
+            # Espera por intervalos cortos: la cancelación no tiene que esperar a que acabe un PDF largo
+            pendientes = set(futures)
+            while pendientes:
+                if self.cancel_event.is_set():
+                    self.terminar(False, "Composición cancelada.")
+                    return
 
+                hechos, pendientes = wait(pendientes, timeout=INTERVALO_CANCELACION_PDF, return_when=FIRST_COMPLETED)
+                for future in hechos:
+                    coll_name = futures[future]
+                    try:
+                        mensajes = future.result()
                     except Exception as e:
-                        self.log.emit(f"Error generando PDF para '{coll_name}': {str(e)}")
+                        mensajes = [f"Error generando PDF para '{coll_name}': {str(e)}"]
+                    for mensaje in mensajes:
+                        self.registrar(mensaje)
 
-                self.progress.emit(int((i / total) * 100))
+                    pasos_hechos += 1
+                    self.actualizar_progreso(int((pasos_hechos / pasos_totales) * 100))
 
-            client.close()
-            self.finished.emit(True, "Composición completada.")
+            self.terminar(True, "Composición completada.")
         except Exception as e:
-            self.finished.emit(False, f"Error composición: {str(e)}")
+            self.terminar(False, f"Error composición: {str(e)}")
+        finally:
+            if pdf_pool is not None:
+                # Los PDF pendientes se descartan sin bloquear la GUI
+                pdf_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def build_pdf(coll_name, lineas, save_dir):
+    """
+    Genera el PDF de una colección. Se ejecuta en un proceso aparte (la maquetación de
+    ReportLab es CPU pura), así que devuelve los mensajes de log en lugar de emitirlos.
+    """
+    mensajes = []
+    try:
+        pdf_file = os.path.join(save_dir, f"{coll_name}.pdf")
+
+        # Crear un estilo personalizado con justificación (no sobrescribimos el stylesheet global)
+        styles = getSampleStyleSheet()
+        body_style = ParagraphStyle(
+            'CustomBody',
+            parent=styles['BodyText'],
+            fontName="Helvetica",
+            fontSize=12,
+            alignment=TA_JUSTIFY,
+            leading=14
+        )
+
+        # Función para dibujar el número de página en el footer
+        def draw_page_number(canvas, doc):
+            try:
+                canvas.setFont('Helvetica', 10)
+                page_num = canvas.getPageNumber()
+                text = f"Página {page_num}"
+                canvas.drawRightString(letter[0] - 0.5 * inch, 0.75 * inch, text)
+            except Exception as e:
+                # Registrar el error (no arrojar excepción a ReportLab)
+                mensajes.append(f"Error en draw_page_number: {str(e)}")
+
+        # Crear el documento con SimpleDocTemplate (callbacks se pasan a build)
+        pdf_template = SimpleDocTemplate(
+            pdf_file,
+            pagesize=letter,
+            leftMargin=0.5*inch,
+            rightMargin=0.5*inch,
+            topMargin=0.75*inch,
+            bottomMargin=1*inch
+        )
+
+        story = []
+
+        # Add some space at the top
+        story.append(Spacer(1, 0.25*inch))
+
+        num_paragraphs = 0
+        for linea in lineas:
+            linea_content = linea.strip()
+            if linea_content:
+                p = Paragraph(linea_content, body_style)
+                story.append(p)
+                story.append(Spacer(1, 0.1*inch))
+                num_paragraphs += 1
+
+        if num_paragraphs == 0:
+            # Agregar mensaje por defecto si no hay contenido
+            p = Paragraph("No hay contenido disponible.", body_style)
+            story.append(p)
+
+        mensajes.append(f"Preparado PDF con {num_paragraphs} párrafos.")
+        mensajes.append(f"Generando PDF - len(story): {len(story)}")
+
+        # Aquí pasamos los callbacks a build (corrección clave)
+        pdf_template.build(story, onFirstPage=draw_page_number, onLaterPages=draw_page_number)
+
+        # Verificar que el archivo exista y tenga tamaño
+        if os.path.exists(pdf_file) and os.path.getsize(pdf_file) > 0:
+            mensajes.append(f"Archivo PDF creado: {pdf_file}")
+        else:
+            mensajes.append(f"PDF creado pero está vacío o no existe: {pdf_file}")
 
-    def cancel(self):
-        self.cancelled = True
+    except Exception as e:
+        mensajes.append(f"Error generando PDF para '{coll_name}': {str(e)}")
+
+    return mensajes
 
 
 # (El resto de la UI y MainWindow queda exactamente igual que tu versión; lo incluyo aquí para que el archivo sea ejecutable)
@@ -458,6 +799,12 @@ class MainWindow(QWidget):
         """)
 
     def setup_ui(self):
+        # Elementos mostrados en cada lista por nombre de colección (para actualizarlas por diferencias)
+        self._collection_items = {}
+        self._translated_items = {}
+        # Consultas de colecciones en curso en el pool
+        self._cargas = set()
+
         main_layout = QVBoxLayout()
 
         # Tabs
@@ -474,13 +821,41 @@ class MainWindow(QWidget):
         self.log_text = QTextEdit()
         self.log_text.setReadOnly(True)
         log_layout.addWidget(self.log_text)
+        self.log_group.setLayout(log_layout)
 
         main_layout.addWidget(self.log_group)
 
         self.setLayout(main_layout)
 
         self.worker = None
-        self.thread = None
+        self._ollama_ok_hasta = 0.0
+
+        # Último directorio de salida, persistente entre sesiones
+        self._settings = QSettings("bgonpin", "TRADUCTOR_ARCHIVOS")
+        self._last_save_dir = self._settings.value(
+            "last_save_dir", QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation), str)
+
+        # Estado de los botones cuando no hay ningún trabajo en curso
+        self._idle_button_state = [
+            (self.extract_btn, "Extraer Texto", True),
+            (self.translate_btn, "Traducir Seleccionadas", True),
+            (self.translate_cancel_btn, "Cancelar", False),
+            (self.compose_btn, "Componer Archivos TXT y PDF", True),
+        ]
+
+        # Los mensajes se acumulan y se insertan en bloque desde un temporizador
+        # Acotados igual que los documentos: si llegan más líneas de las que caben, las antiguas ni se insertan
+        self._log_buf = deque(maxlen=MAX_LINEAS_LOG)
+        self._translation_log_buf = deque(maxlen=MAX_LINEAS_LOG)
+        self.log_text.document().setMaximumBlockCount(MAX_LINEAS_LOG)
+        self.translation_log.document().setMaximumBlockCount(MAX_LINEAS_LOG)
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(LOG_REFRESCO_GUI_MS)
+        self._log_timer.timeout.connect(self.volcar_registros)
+        self._log_timer.start()
+
+        # Los trabajos se ejecutan en el pool global: sus hilos se reutilizan entre ejecuciones
+        QThreadPool.globalInstance().setMaxThreadCount(HILOS_POOL_QT)
 
     def setup_extraction_tab(self):
         tab = QWidget()
@@ -519,6 +894,7 @@ class MainWindow(QWidget):
         collections_layout = QVBoxLayout()
         self.translation_list = QListWidget()
         self.translation_list.setSelectionMode(QListWidget.MultiSelection)
+        self.translation_list.setSortingEnabled(True)
         self.refresh_btn = QPushButton("Actualizar Colecciones")
         collections_layout.addWidget(self.translation_list)
         collections_layout.addWidget(self.refresh_btn)
@@ -591,6 +967,7 @@ class MainWindow(QWidget):
         collections_layout = QVBoxLayout()
         self.composition_list = QListWidget()
         self.composition_list.setSelectionMode(QListWidget.MultiSelection)
+        self.composition_list.setSortingEnabled(True)
         self.refresh_translation_btn = QPushButton("Actualizar Colecciones Traducidas")
         collections_layout.addWidget(self.composition_list)
         collections_layout.addWidget(self.refresh_translation_btn)
@@ -612,230 +989,299 @@ class MainWindow(QWidget):
         return tab
 
     def connect_signals(self):
+        # Señales de los trabajos: una instancia por tipo, conectada una sola vez y reutilizada en cada ejecución
+        self.extraction_signals = WorkerSignals(self)
+        self.translation_signals = WorkerSignals(self)
+        self.composition_signals = WorkerSignals(self)
+
         # Extraction
         self.select_file_btn.clicked.connect(self.select_file)
         self.extract_btn.clicked.connect(self.start_extraction)
+        self.extraction_signals.log_batch.connect(self.log_batch, Qt.QueuedConnection)
+        self.extraction_signals.finished.connect(self.on_worker_finished, Qt.QueuedConnection)
 
         # Translation
         self.refresh_btn.clicked.connect(self.load_collections)
         self.translate_btn.clicked.connect(self.start_translation)
-        self.translate_cancel_btn.clicked.connect(self.cancel_translation)
+        self.translate_cancel_btn.clicked.connect(self.cancel_worker)
+        self.translation_signals.progress.connect(self.translation_progress.setValue, Qt.QueuedConnection)
+        self.translation_signals.log_batch.connect(self.log_translation_batch, Qt.QueuedConnection)
+        self.translation_signals.finished.connect(self.on_worker_finished, Qt.QueuedConnection)
 
         # Composition
         self.refresh_translation_btn.clicked.connect(self.load_translated_collections)
         self.compose_btn.clicked.connect(self.start_composition)
+        self.composition_signals.log_batch.connect(self.log_batch, Qt.QueuedConnection)
+        self.composition_signals.finished.connect(self.on_worker_finished, Qt.QueuedConnection)
+
+    def mostrar_mensaje(self, icono, titulo, texto):
+        """Muestra un QMessageBox con open(): no bloquea en un bucle de eventos anidado."""
+        mb = QMessageBox(icono, titulo, texto, QMessageBox.Ok, self)
+        mb.finished.connect(mb.deleteLater)
+        mb.open()
+
+    def abrir_dialogo(self, dlg, on_selected, on_rejected):
+        """Muestra un QFileDialog con open() (sin bucle de eventos anidado) y continúa en los callbacks."""
+        dlg.fileSelected.connect(on_selected)
+        dlg.rejected.connect(on_rejected)
+        dlg.finished.connect(dlg.deleteLater)
+        dlg.open()
 
     def select_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Seleccionar archivo", "", "Archivos de texto (*.txt);;PDF (*.pdf)")
-        if file_path:
-            self.extraction_file_path = file_path
-            self.extraction_file_label.setText(f"Archivo seleccionado: {os.path.basename(file_path)}")
-            self.extract_btn.setEnabled(True)
-            self.log(f"Archivo seleccionado: {os.path.basename(file_path)}")
-        else:
-            self.extract_btn.setEnabled(False)
-            self.extraction_file_label.setText("Archivo seleccionado: Ninguno")
-            QMessageBox.warning(self, "Error", "No se pudo seleccionar el archivo.")
+        dlg = QFileDialog(self, "Seleccionar archivo", "", "Archivos de texto (*.txt);;PDF (*.pdf)")
+        dlg.setFileMode(QFileDialog.ExistingFile)
+        self.abrir_dialogo(dlg, self.on_file_selected, self.on_file_rejected)
 
-    def load_collections(self):
-        try:
-            client = pymongo.MongoClient()
-            db = client[DATABASE_NAME]
-            collections = db.list_collection_names()
-
-            # Filter original collections (no translated ones)
-            known_suffixes = [f"_traducido_a_{lang}" for lang in IDIOMA_CODES]
-            original_collections = [coll for coll in collections if not any(coll.endswith(suf) for suf in known_suffixes)]
-
-            self.translation_list.clear()
-            for coll in sorted(original_collections):
-                item = QListWidgetItem(coll)
-                self.translation_list.addItem(item)
+    def on_file_selected(self, file_path):
+        self.extraction_file_path = file_path
+        self.extraction_file_label.setText(f"Archivo seleccionado: {os.path.basename(file_path)}")
+        self.extract_btn.setEnabled(True)
+        self.log(f"Archivo seleccionado: {os.path.basename(file_path)}")
 
-            if original_collections:
-                self.translate_btn.setEnabled(True)
-            else:
-                self.translate_btn.setEnabled(False)
+    def on_file_rejected(self):
+        self.extract_btn.setEnabled(False)
+        self.extraction_file_label.setText("Archivo seleccionado: Ninguno")
+        self.mostrar_mensaje(QMessageBox.Warning, "Error", "No se pudo seleccionar el archivo.")
 
-            client.close()
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"No se pudo cargar colecciones: {str(e)}")
+    def load_collections(self):
+        self.cargar_en_pool(self._fetch_collections, self._apply_collections, "No se pudo cargar colecciones")
 
     def load_translated_collections(self):
+        self.cargar_en_pool(self._fetch_translated_collections, self._apply_translated_collections,
+                            "No se pudo cargar colecciones traducidas")
+
+    def cargar_en_pool(self, fetch, apply, mensaje_error):
+        """Ejecuta la consulta en el pool y aplica el resultado en la GUI con una señal encolada."""
+        runnable = LoadRunnable(fetch)
+        # Referencia viva hasta que llegue el resultado (el pool no borra el runnable)
+        self._cargas.add(runnable)
+        runnable.signals.done.connect(apply, Qt.QueuedConnection)
+        runnable.signals.error.connect(
+            lambda error: self.mostrar_mensaje(QMessageBox.Warning, "Error", f"{mensaje_error}: {error}"),
+            Qt.QueuedConnection)
+        runnable.signals.finished.connect(lambda: self._cargas.discard(runnable), Qt.QueuedConnection)
+        QThreadPool.globalInstance().start(runnable)
+
+    @staticmethod
+    def _fetch_collections():
+        """Nombres de las colecciones originales. Se ejecuta fuera de la GUI: no toca objetos Qt."""
+        collections = get_client()[DATABASE_NAME].list_collection_names()
+
+        # Filter original collections (no translated ones)
+        known_suffixes = [f"_traducido_a_{lang}" for lang in IDIOMA_CODES]
+        return [coll for coll in collections if not any(coll.endswith(suf) for suf in known_suffixes)]
+
+    def _apply_collections(self, original_collections):
+        self.actualizar_lista(self.translation_list, self._collection_items, original_collections)
+        self.translate_btn.setEnabled(bool(original_collections))
+
+    @staticmethod
+    def _fetch_translated_collections():
+        """Nombres de las colecciones traducidas. Se ejecuta fuera de la GUI: no toca objetos Qt."""
+        collections = get_client()[DATABASE_NAME].list_collection_names()
+
+        # Filter translated collections
+        return [coll for coll in collections if '_traducido_' in coll]
+
+    def _apply_translated_collections(self, translated_collections):
+        self.actualizar_lista(self.composition_list, self._translated_items, translated_collections)
+        self.compose_btn.setEnabled(bool(translated_collections))
+
+    def actualizar_lista(self, lista, items, nombres):
+        """
+        Añade o quita solo los elementos que han cambiado desde la última carga.
+        La lista está ordenada (setSortingEnabled) y conserva la selección de los que siguen.
+        """
+        nuevos = set(nombres)
+        lista.setUpdatesEnabled(False)
         try:
-            client = pymongo.MongoClient()
-            db = client[DATABASE_NAME]
-            collections = db.list_collection_names()
-
-            # Filter translated collections
-            translated_collections = [coll for coll in collections if '_traducido_' in coll]
-
-            self.composition_list.clear()
-            for coll in sorted(translated_collections):
-                item = QListWidgetItem(coll)
-                self.composition_list.addItem(item)
-
-            if translated_collections:
-                self.compose_btn.setEnabled(True)
-            else:
-                self.compose_btn.setEnabled(False)
-
-            client.close()
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"No se pudo cargar colecciones traducidas: {str(e)}")
+            for nombre in items.keys() - nuevos:
+                lista.takeItem(lista.row(items.pop(nombre)))
+            for nombre in nuevos - items.keys():
+                item = QListWidgetItem(nombre)
+                lista.addItem(item)
+                items[nombre] = item
+        finally:
+            lista.setUpdatesEnabled(True)
+
+    def colecciones_seleccionadas(self, lista):
+        """Nombres seleccionados leídos del modelo, sin crear un QListWidgetItem por elemento."""
+        model = lista.model()
+        return [model.data(idx, Qt.DisplayRole) for idx in lista.selectionModel().selectedIndexes()]
 
     def check_ollama_connection(self):
         """Simple check for Ollama connection"""
+        # Solo se cachea el éxito: si Ollama estaba caído, el siguiente clic vuelve a comprobarlo
+        if time.monotonic() < self._ollama_ok_hasta:
+            return True
         try:
-            payload = {
-                "model": MODEL_NAME,
-                "prompt": "Hello",
-                "stream": False
-            }
-            response = requests.post(OLLAMA_URL, json=payload, timeout=5)
-            return response.status_code == 200
+            # Listar modelos no ejecuta el modelo, a diferencia de una petición de generación
+            response = _SESSION.get(OLLAMA_TAGS_URL, timeout=2)
+            ok = response.ok and MODEL_NAME in response.text
         except:
             return False
+        if ok:
+            self._ollama_ok_hasta = time.monotonic() + OLLAMA_CHECK_TTL
+        return ok
 
     def start_extraction(self):
         if not hasattr(self, 'extraction_file_path'):
-            QMessageBox.warning(self, "Error", "Seleccione un archivo primero.")
+            self.mostrar_mensaje(QMessageBox.Warning, "Error", "Seleccione un archivo primero.")
             return
 
-        # Check if thread is running
-        if self.thread and self.thread.isRunning():
+        # Check if a job is running
+        if self.worker is not None:
             return
 
-        self.worker = ExtractionWorker(self.extraction_file_path)
-        self.worker.finished.connect(self.on_worker_finished)
-
-        from PySide6.QtCore import QThread
-        self.thread = QThread()
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
+        self.worker = ExtractionWorker(self.extraction_signals, self.extraction_file_path)
 
         self.extract_btn.setText("Extrayendo...")
         self.extract_btn.setEnabled(False)
-        self.thread.start()
+        self.translate_cancel_btn.setEnabled(True)
+        QThreadPool.globalInstance().start(self.worker)
 
     def start_translation(self):
-        selected_items = self.translation_list.selectedItems()
-        if not selected_items:
-            QMessageBox.warning(self, "Error", "Seleccione al menos una colección.")
+        collections = self.colecciones_seleccionadas(self.translation_list)
+        if not collections:
+            self.mostrar_mensaje(QMessageBox.Warning, "Error", "Seleccione al menos una colección.")
             return
 
         if not self.check_ollama_connection():
-            QMessageBox.warning(self, "Error", "No se puede conectar a Ollama. Asegúrese de que esté ejecutándose.")
+            self.mostrar_mensaje(QMessageBox.Warning, "Error", "No se puede conectar a Ollama. Asegúrese de que esté ejecutándose.")
             return
 
-        collections = [item.text() for item in selected_items]
         source_idx = self.source_combo.currentIndex()
         target_idx = self.target_combo.currentIndex()
         source_lang = IDIOMA_CODES[source_idx]
         target_lang = IDIOMA_CODES[target_idx]
 
         if source_lang == target_lang:
-            QMessageBox.warning(self, "Error", "Los idiomas deben ser diferentes.")
+            self.mostrar_mensaje(QMessageBox.Warning, "Error", "Los idiomas deben ser diferentes.")
             return
 
-        # Check if thread is running
-        if self.thread and self.thread.isRunning():
+        # Check if a job is running
+        if self.worker is not None:
             return
 
-        self.worker = TranslationWorker(collections, source_lang, target_lang)
-        self.worker.progress.connect(self.translation_progress.setValue)
-        self.worker.log.connect(self.log_translation)
-        self.worker.finished.connect(self.on_worker_finished)
-
-        from PySide6.QtCore import QThread
-        self.thread = QThread()
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.thread.finished.connect(self.thread.quit)
+        self.worker = TranslationWorker(self.translation_signals, collections, source_lang, target_lang)
 
         # Clear translation log and reset progress
+        self._translation_log_buf.clear()
         self.translation_log.clear()
         self.translation_progress.setValue(0)
 
         self.translate_btn.setText("Traduciendo...")
         self.translate_btn.setEnabled(False)
         self.translate_cancel_btn.setEnabled(True)
-        self.thread.start()
+        QThreadPool.globalInstance().start(self.worker)
 
-    def cancel_translation(self):
-        if self.worker and isinstance(self.worker, TranslationWorker) and self.thread and self.thread.isRunning():
+    def cancel_worker(self):
+        # Vale para cualquier trabajo en curso (extracción, traducción o composición)
+        if self.worker is not None:
             self.worker.cancel()
             self.translate_cancel_btn.setText("Cancelando...")
             self.translate_cancel_btn.setEnabled(False)
 
     def start_composition(self):
-        selected_items = self.composition_list.selectedItems()
-        if not selected_items:
-            QMessageBox.warning(self, "Error", "Seleccione al menos una colección.")
+        collections = self.colecciones_seleccionadas(self.composition_list)
+        if not collections:
+            self.mostrar_mensaje(QMessageBox.Warning, "Error", "Seleccione al menos una colección.")
             return
 
-        collections = [item.text() for item in selected_items]
-        save_dir = QFileDialog.getExistingDirectory(self, "Seleccionar directorio para guardar archivos")
-        if not save_dir:
-            save_dir = os.getcwd()
+        dlg = QFileDialog(self, "Seleccionar directorio para guardar archivos", self._last_save_dir)
+        dlg.setFileMode(QFileDialog.Directory)
+        dlg.setOption(QFileDialog.ShowDirsOnly, True)
+        # Sin directorio elegido no se compone nada
+        self.abrir_dialogo(dlg,
+                           lambda save_dir: self.start_composition_with_dir(collections, save_dir),
+                           lambda: self.log("Composición cancelada: no se seleccionó directorio."))
 
-        # Check if thread is running
-        if self.thread and self.thread.isRunning():
-            return
+    def start_composition_with_dir(self, collections, save_dir):
+        self._last_save_dir = save_dir
+        self._settings.setValue("last_save_dir", save_dir)
 
-        self.worker = CompositionWorker(collections, save_dir, True)
-        self.worker.log.connect(self.log)
-        self.worker.finished.connect(self.on_worker_finished)
+        # Check if a job is running
+        if self.worker is not None:
+            return
 
-        from PySide6.QtCore import QThread
-        self.thread = QThread()
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.thread.finished.connect(self.thread.quit)
+        self.worker = CompositionWorker(self.composition_signals, collections, save_dir, True)
 
         self.compose_btn.setText("Componiendo...")
         self.compose_btn.setEnabled(False)
-        self.thread.start()
+        self.translate_cancel_btn.setEnabled(True)
+        QThreadPool.globalInstance().start(self.worker)
 
     def on_worker_finished(self, success, message):
-        # Reset buttons
-        self.extract_btn.setText("Extraer Texto")
-        self.extract_btn.setEnabled(True)
-        self.translate_btn.setText("Traducir Seleccionadas")
-        self.translate_btn.setEnabled(True)
-        self.translate_cancel_btn.setText("Cancelar")
-        self.translate_cancel_btn.setEnabled(False)
-        self.compose_btn.setText("Componer Archivos")
-        self.compose_btn.setEnabled(True)
+        # Reset buttons in a single repaint
+        self.setUpdatesEnabled(False)
+        try:
+            for btn, text, enabled in self._idle_button_state:
+                btn.setText(text)
+                btn.setEnabled(enabled)
+        finally:
+            self.setUpdatesEnabled(True)
 
-        if self.thread:
-            self.thread.quit()
-            self.thread.wait()
+        # Refresh collections in the pool; the lists update when the query returns
+        self.load_collections()
+        self.load_translated_collections()
 
         if success:
-            QMessageBox.information(self, "Éxito", message)
+            self.mostrar_mensaje(QMessageBox.Information, "Éxito", message)
         else:
-            QMessageBox.warning(self, "Error", message)
-
-        # Refresh collections if needed
-        self.load_collections()
-        self.load_translated_collections()
+            self.mostrar_mensaje(QMessageBox.Warning, "Error", message)
 
-        # Reset worker and thread
+        # Reset worker
         self.worker = None
-        self.thread = None
 
     def log(self, message):
-        self.log_text.append(message)
-        # Auto-scroll to bottom
-        scrollbar = self.log_text.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
+        self._log_buf.append(message)
 
     def log_translation(self, message):
-        self.translation_log.append(message)
+        self._translation_log_buf.append(message)
+
+    def log_batch(self, messages):
+        self._log_buf.extend(messages)
+
+    def log_translation_batch(self, messages):
+        self._translation_log_buf.extend(messages)
+
+    def volcar_registros(self):
+        self.volcar_texto(self.log_text, self._log_buf)
+        self.volcar_texto(self.translation_log, self._translation_log_buf)
+
+    def volcar_texto(self, text_edit, buf):
+        """Inserta los mensajes pendientes en una sola edición y desplaza al final una vez."""
+        if not buf:
+            return
+        texto = "\n".join(buf)
+        buf.clear()
+        if not text_edit.document().isEmpty():
+            texto = "\n" + texto
+
+        # Solo se sigue el final si el usuario no ha subido a leer el historial
+        scrollbar = text_edit.verticalScrollBar()
+        seguir = scrollbar.value() >= scrollbar.maximum() - 4
+
+        # Cursor propio: no mueve la selección del usuario
+        cursor = QTextCursor(text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        text_edit.setUpdatesEnabled(False)
+        cursor.beginEditBlock()
+        cursor.insertText(texto)
+        cursor.endEditBlock()
+        text_edit.setUpdatesEnabled(True)
+
         # Auto-scroll to bottom
-        scrollbar = self.translation_log.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
+        if seguir:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def closeEvent(self, event):
+        # Cancelar el trabajo en curso y esperar a que el pool termine antes de destruir la ventana
+        if self.worker is not None:
+            self.worker.cancel()
+        self._log_timer.stop()
+        QThreadPool.globalInstance().waitForDone()
+        event.accept()
 
 
 